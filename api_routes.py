@@ -2,10 +2,12 @@
 api_routes.py - واجهات برمجة التطبيقات لنظام Fixltpro
 """
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, jsonify, request, session, make_response, current_app
 from models import db, Department, Section, Category, SubCategory, Ticket, User, Beneficiary, Comment
 from flask_wtf.csrf import CSRFProtect
 from datetime import datetime, timedelta
+from reference_data import bump_reference_data_version
+from taxonomy import get_taxonomy_tree
 
 # إنشاء Blueprint للواجهات البرمجية
 api = Blueprint('api', __name__)
@@ -20,37 +22,38 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE')
     return response
 
+def taxonomy_response(build_payload):
+    """
+    استجابة JSON من شجرة التصنيفات مع ETag حسب رقم إصدار البيانات المرجعية
+
+    إذا أرسل المتصفح نفس ETag تُرجع 304 دون بناء البيانات.
+    """
+    tree = get_taxonomy_tree()
+    if request.if_none_match.contains(tree['etag']):
+        response = make_response('', 304)
+    else:
+        response = jsonify(build_payload(tree))
+    response.set_etag(tree['etag'])
+    response.headers['Cache-Control'] = f"private, max-age={current_app.config.get('TAXONOMY_CACHE_MAX_AGE', 0)}, must-revalidate"
+    return response
+
+# API لجلب شجرة التصنيفات والإدارات كاملة
+@api.route('/taxonomy', methods=['GET'])
+def get_taxonomy():
+    """الحصول على التصنيفات مع تصنيفاتها الفرعية والإدارات مع أقسامها"""
+    return taxonomy_response(lambda tree: tree['payload'])
+
 # API لجلب الأقسام التابعة لإدارة معينة
 @api.route('/sections/<int:department_id>', methods=['GET'])
 def get_sections(department_id):
     """الحصول على الأقسام لإدارة معينة"""
-    sections = Section.query.filter_by(department_id=department_id).all()
-    
-    # تحويل الكائنات إلى قائمة للتمثيل JSON
-    sections_list = []
-    for section in sections:
-        sections_list.append({
-            'id': section.id,
-            'name': section.name
-        })
-    
-    return jsonify({'sections': sections_list})
+    return taxonomy_response(lambda tree: {'sections': tree['sections'].get(department_id, [])})
 
 # API لجلب التصنيفات الفرعية لتصنيف معين
 @api.route('/subcategories/<int:category_id>', methods=['GET'])
 def get_subcategories(category_id):
     """الحصول على التصنيفات الفرعية لتصنيف معين"""
-    subcategories = SubCategory.query.filter_by(category_id=category_id).all()
-    
-    # تحويل الكائنات إلى قائمة للتمثيل JSON
-    subcategories_list = []
-    for subcategory in subcategories:
-        subcategories_list.append({
-            'id': subcategory.id,
-            'name': subcategory.name
-        })
-    
-    return jsonify({'subcategories': subcategories_list})
+    return taxonomy_response(lambda tree: {'subcategories': tree['subcategories'].get(category_id, [])})
 
 # API للبحث عن المستفيدين
 @api.route('/beneficiaries/search', methods=['GET'])
@@ -123,6 +126,7 @@ def add_department():
     
     db.session.add(department)
     db.session.commit()
+    bump_reference_data_version()
     
     return jsonify({
         'status': 'success',
@@ -163,6 +167,7 @@ def add_section():
     
     db.session.add(section)
     db.session.commit()
+    bump_reference_data_version()
     
     return jsonify({
         'status': 'success',
@@ -196,6 +201,7 @@ def add_category():
     
     db.session.add(category)
     db.session.commit()
+    bump_reference_data_version()
     
     return jsonify({
         'status': 'success',
@@ -236,6 +242,7 @@ def add_subcategory():
     
     db.session.add(subcategory)
     db.session.commit()
+    bump_reference_data_version()
     
     return jsonify({
         'status': 'success',
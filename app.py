@@ -11,18 +11,11 @@ from wtforms import StringField, PasswordField, BooleanField, validators
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
 from functools import wraps
-from fpdf import FPDF
-import arabic_reshaper
-from bidi.algorithm import get_display
 import io
 import os
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
-import base64
 
 # استيراد النماذج من ملف models.py - إضافة جديدة
-from models import db, User, Ticket, TicketPriority, TicketStatus, Category, SubCategory, Department, Section, Attachment, Comment, Beneficiary
+from models import db, User, Ticket, TicketPriority, TicketStatus, Category, SubCategory, Department, Section, Attachment, Comment, Beneficiary, ReportJob
 
 # استيراد واجهات API من api_routes.py - إضافة جديدة
 from api_routes import api as api_blueprint, csrf
@@ -30,26 +23,210 @@ from api_routes import api as api_blueprint, csrf
 
 from maintenance_routes import add_maintenance_routes
 
-# إنشاء تطبيق Flask
+from ticket_queries import ticket_listing_query, open_tickets_filter, overdue_tickets_query, dashboard_filters, dashboard_tickets_query
+from ticket_stats import get_ticket_statistics, get_user_ticket_statistics, report_rows, report_overdue_count, technician_performance_rows
+from ticket_counters import rebuild_ticket_counters, ensure_ticket_counters, move_rollup_category
+from report_cache import configure_report_cache, report_cache_key, get_cached_report, store_report, report_cache_stats
+from reference_data import get_reference_data, bump_reference_data_version, ensure_cache_versions_table
+from user_context import load_current_identity, get_current_user
+from taxonomy import build_ticket_title, taxonomy_json
+from ticket_registry import load_ticket_registry, status_id as registry_status_id, priority_id as registry_priority_id, status_code, priority_code
+from migrations import run_migrations
+from database_config import normalize_database_uri, database_engine_options, database_binds
+from db_routing import read_replica, replica_reads, primary_reads
+from sqlite_tuning import sqlite_pragmas, install_sqlite_pragmas, current_sqlite_pragmas, run_concurrency_check
+from query_plans import explain_main_queries
+from report_jobs import ensure_report_jobs_table, submit_report_job, report_job_status, report_job_result
+from form_jobs import ensure_form_render_jobs_table, ticket_form_jobs
+
+# إنشاء تطبيق Flask (المسارات تُسجل عليه عند الاستيراد، والإعدادات وقاعدة البيانات في create_app)
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'مفتاح_سري_للغاية')
-
-# إعداد اتصال SQLite
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'fixltpro.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# تهيئة قاعدة البيانات
-db.init_app(app)
 
-# تهيئة csrf
-csrf.init_app(app)
+# إعداد مسار المرفقات
+UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
 
-# تسجيل Blueprint للواجهات البرمجية
+# تسجيل Blueprint للواجهات البرمجية (قبل مسارات app.py حتى تكون له الأولوية في المسارات المكررة)
 app.register_blueprint(api_blueprint, url_prefix='/api')
 
 add_maintenance_routes(app)
 
+
+def configure_app(app):
+    """قراءة إعدادات التطبيق من متغيرات البيئة"""
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'مفتاح_سري_للغاية')
+
+    # إعداد الاتصال بقاعدة البيانات (DATABASE_URL مثل postgresql://...، والافتراضي ملف SQLite المحلي)
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_uri(
+        os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'fixltpro.db')
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # مجمع الاتصالات ومهلة الاستعلام (لـ PostgreSQL وغيرها من الخوادم، لا تنطبق على SQLite)
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # بالثواني
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1').lower() not in ('0', 'false', 'no')
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))  # بالملي ثانية، 0 لتعطيلها
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database_engine_options(app.config)
+
+    # نسخة قراءة اختيارية لصفحات التقارير ولوحات التحكم (تُستخدم الرئيسية عند تعذر الاتصال بها)
+    app.config['DATABASE_REPLICA_URL'] = os.environ.get('DATABASE_REPLICA_URL')
+    app.config['DATABASE_REPLICA_RETRY_INTERVAL'] = int(os.environ.get('DATABASE_REPLICA_RETRY_INTERVAL', 30))  # بالثواني
+    app.config['SQLALCHEMY_BINDS'] = database_binds(app.config)
+
+    # إعدادات أداء SQLite لكل اتصال (مناسبة لتشغيل عدة عمليات gunicorn على نفس الملف)
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # القيمة السالبة بالكيلوبايت (64 ميجابايت)
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # بالبايت
+    app.config['SQLITE_TEMP_STORE'] = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # بالملي ثانية
+
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 ميجابايت كحد أقصى
+
+    # عدد البلاغات في كل صفحة من قائمة البلاغات (قابل للتعديل عبر متغير البيئة)
+    app.config['TICKETS_PAGE_SIZE'] = int(os.environ.get('TICKETS_PAGE_SIZE', 50))
+    app.config['TICKETS_MAX_PAGE_SIZE'] = 200
+
+    # عدد البلاغات المتأخرة المعروضة في لوحة تحكم الإدارة (الأكثر تأخيراً أولاً)
+    app.config['OVERDUE_LIST_LIMIT'] = int(os.environ.get('OVERDUE_LIST_LIMIT', 50))
+
+    # الذاكرة المؤقتة لنتائج صفحة التقارير (مدة الصلاحية بالثواني، 0 لتعطيلها)
+    app.config['REPORT_CACHE_TTL'] = int(os.environ.get('REPORT_CACHE_TTL', 300))
+    app.config['REPORT_CACHE_MAX_ENTRIES'] = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 64))
+    configure_report_cache(app.config['REPORT_CACHE_MAX_ENTRIES'], app.config['REPORT_CACHE_TTL'])
+
+    # التقارير التي تساوي فترتها هذا العدد من الأيام أو أكثر تُحسب في الخلفية
+    app.config['REPORT_BACKGROUND_MIN_DAYS'] = int(os.environ.get('REPORT_BACKGROUND_MIN_DAYS', 180))
+    app.config['REPORT_JOB_WORKERS'] = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    app.config['REPORT_JOB_TIMEOUT'] = int(os.environ.get('REPORT_JOB_TIMEOUT', 900))  # بالثواني
+    app.config['REPORT_JOB_RETENTION'] = 24 * 60 * 60  # مدة الاحتفاظ بالمهام المنتهية بالثواني
+
+    # إنشاء ملف PDF لنموذج الصيانة في الخلفية (عدد الخيوط ومحاولات الإنشاء والانتظار بينها بالثواني)
+    app.config['FORM_RENDER_WORKERS'] = int(os.environ.get('FORM_RENDER_WORKERS', 2))
+    app.config['FORM_RENDER_MAX_ATTEMPTS'] = int(os.environ.get('FORM_RENDER_MAX_ATTEMPTS', 3))
+    app.config['FORM_RENDER_RETRY_DELAY'] = int(os.environ.get('FORM_RENDER_RETRY_DELAY', 5))
+    app.config['FORM_RENDER_TIMEOUT'] = int(os.environ.get('FORM_RENDER_TIMEOUT', 300))  # بعدها تعتبر المهمة المعلقة فاشلة
+    app.config['FORM_RENDER_RETENTION'] = 24 * 60 * 60  # مدة الاحتفاظ بالمهام المنتهية بالثواني
+
+    # تصدير نماذج الصيانة من لوحة تحكم الإدارة (أقصى عدد بلاغات في الملف، وعدد البلاغات في كل استعلام)
+    app.config['MAINTENANCE_EXPORT_MAX_TICKETS'] = int(os.environ.get('MAINTENANCE_EXPORT_MAX_TICKETS', 500))
+    app.config['MAINTENANCE_EXPORT_BATCH_SIZE'] = int(os.environ.get('MAINTENANCE_EXPORT_BATCH_SIZE', 50))
+
+    # أقصى مدة (بالثواني) قبل أن تتحقق العملية من تغيير البيانات المرجعية في العمليات الأخرى
+    app.config['REFERENCE_DATA_CHECK_INTERVAL'] = int(os.environ.get('REFERENCE_DATA_CHECK_INTERVAL', 5))
+
+    # مدة تخزين هوية المستخدم المسجل دخوله في كل عملية بالثواني (0 لتعطيله والاستعلام مرة في كل طلب)
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 0))
+
+    # مدة صلاحية واجهات التصنيفات في المتصفح بالثواني قبل إعادة التحقق عبر ETag (0 للتحقق في كل طلب)
+    app.config['TAXONOMY_CACHE_MAX_AGE'] = int(os.environ.get('TAXONOMY_CACHE_MAX_AGE', 0))
+
+
+def run_startup_tasks(app):
+    """
+    تهيئة الجداول المضافة لقواعد البيانات القائمة وتطبيق الترحيلات وتحميل سجل الحالات
+
+    في النهاية تُغلق اتصالات بدء التشغيل حتى لا ترثها العمليات المنسوخة عند gunicorn --preload.
+    """
+    with app.app_context():
+        try:
+            ensure_ticket_counters()
+        except Exception as e:
+            app.logger.error(f"خطأ في تهيئة عدادات البلاغات: {str(e)}")
+        try:
+            ensure_report_jobs_table()
+        except Exception as e:
+            app.logger.error(f"خطأ في تهيئة جدول مهام التقارير: {str(e)}")
+        try:
+            ensure_form_render_jobs_table()
+        except Exception as e:
+            app.logger.error(f"خطأ في تهيئة جدول مهام نماذج الصيانة: {str(e)}")
+        try:
+            ensure_cache_versions_table()
+        except Exception as e:
+            app.logger.error(f"خطأ في تهيئة جدول إصدارات البيانات المرجعية: {str(e)}")
+        try:
+            run_migrations()
+        except Exception as e:
+            app.logger.error(f"خطأ في تطبيق ترحيلات قاعدة البيانات: {str(e)}")
+        try:
+            load_ticket_registry()
+        except Exception as e:
+            app.logger.error(f"خطأ في تحميل سجل الحالات والأولويات: {str(e)}")
+        db.engine.dispose()
+
+
+def create_app():
+    """
+    مصنع التطبيق: الإعدادات وقاعدة البيانات ومهام بدء التشغيل (مرة واحدة لكل عملية)
+
+    يعمل مع gunicorn 'app:create_app()' أو app:app، ومع --preload تتم التهيئة في العملية
+    الرئيسية فقط. مكتبات PDF و Excel (fpdf, arabic_reshaper, bidi, openpyxl, PIL) لا تُستورد
+    هنا وإنما عند أول استخدام داخل مساراتها.
+    """
+    if 'sqlalchemy' in app.extensions:
+        return app
+
+    configure_app(app)
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+
+    # تهيئة قاعدة البيانات
+    db.init_app(app)
+
+    with app.app_context():
+        try:
+            install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
+        except Exception as e:
+            app.logger.error(f"خطأ في إعدادات أداء SQLite: {str(e)}")
+
+    # تهيئة csrf
+    csrf.init_app(app)
+
+    run_startup_tasks(app)
+    return app
+
+@app.cli.command('rebuild-ticket-counters')
+def rebuild_ticket_counters_command():
+    """إعادة حساب جدول عدادات البلاغات من البداية"""
+    rows = rebuild_ticket_counters()
+    print(f'تمت إعادة بناء عدادات البلاغات ({rows} صف)')
+
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """تطبيق ترحيلات قاعدة البيانات التي لم تُطبق بعد"""
+    versions = run_migrations()
+    if versions:
+        print(f"تم تطبيق الترحيلات: {', '.join(str(version) for version in versions)}")
+    else:
+        print('قاعدة البيانات محدثة')
+
+
+@app.cli.command('sqlite-concurrency-check')
+def sqlite_concurrency_check_command():
+    """مقارنة القراءة أثناء الكتابة المتزامنة بين الإعدادات الحالية ووضع السجل الافتراضي"""
+    if db.engine.dialect.name != 'sqlite':
+        print(f'قاعدة البيانات الحالية ليست SQLite ({db.engine.dialect.name})')
+        return
+    print(f'الإعدادات الحالية: {current_sqlite_pragmas(db.engine)}')
+    pragmas = sqlite_pragmas(app.config)
+    rollback_pragmas = [(name, 'DELETE' if name == 'journal_mode' else value) for name, value in pragmas]
+    for label, check_pragmas in (('الإعدادات الحالية', pragmas), ('journal_mode=DELETE', rollback_pragmas)):
+        print(f'{label}: {run_concurrency_check(check_pragmas)}')
+
+
+@app.cli.command('explain-queries')
+def explain_queries_command():
+    """عرض خطط تنفيذ الاستعلامات الرئيسية والفهارس المستخدمة فيها"""
+    for name, plan in explain_main_queries():
+        print(f'== {name}')
+        for line in plan:
+            print(f'   {line}')
+
 # إضافة فلتر nl2br لتحويل الأسطر الجديدة إلى <br>
 @app.template_filter('nl2br')
 def nl2br_filter(text):
@@ -57,14 +234,6 @@ def nl2br_filter(text):
         return text.replace('\n', '<br>')
     return ''
 
-# إعداد مسار المرفقات
-UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 ميجابايت كحد أقصى
-
 # الامتدادات المسموح بها
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'txt'}
 
@@ -82,7 +251,7 @@ def login_required(user_type=None):
                 flash('يرجى تسجيل الدخول أولاً', 'error')
                 return redirect(url_for('login'))
             
-            user = User.query.get(session['user_id'])
+            user = load_current_identity()
             if not user:
                 session.pop('user_id', None)
                 flash('يرجى تسجيل الدخول مرة أخرى', 'error')
@@ -106,16 +275,13 @@ def calculate_due_date(priority_id):
     return datetime.utcnow() + timedelta(hours=priority.response_time)
 
 
-def get_current_user():
-    """الحصول على المستخدم الحالي"""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
-
 
 # إضافة الدالة التالية للتأكد من وجود أولوية "بوقت محدد"
-def ensure_custom_priority_exists():
-    """التأكد من وجود أولوية خاصة للوقت المحدد"""
+def ensure_custom_priority_id():
+    """معرف الأولوية الخاصة للوقت المحدد (تُنشأ إذا لم تكن موجودة)"""
+    custom_priority_id = registry_priority_id('custom')
+    if custom_priority_id:
+        return custom_priority_id
     custom_priority = TicketPriority.query.filter_by(is_custom=True).first()
     if not custom_priority:
         # إنشاء أولوية جديدة للوقت المحدد
@@ -127,7 +293,8 @@ def ensure_custom_priority_exists():
         )
         db.session.add(custom_priority)
         db.session.commit()
-    return custom_priority
+        bump_reference_data_version()
+    return custom_priority.id
 
 # تعريف نموذج تسجيل الدخول
 class LoginForm(FlaskForm):
@@ -146,7 +313,7 @@ def login_required(user_type=None):
                 flash('يرجى تسجيل الدخول أولاً', 'error')
                 return redirect(url_for('login'))
             
-            user = User.query.get(session['user_id'])
+            user = load_current_identity()
             if not user:
                 session.pop('user_id', None)
                 flash('يرجى تسجيل الدخول مرة أخرى', 'error')
@@ -170,14 +337,6 @@ def calculate_due_date(priority_id):
     return datetime.utcnow() + timedelta(hours=priority.response_time)
 
 
-def get_current_user():
-    """الحصول على المستخدم الحالي"""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
-
-
-
 @app.route('/')
 def index():
     """الصفحة الرئيسية"""
@@ -194,7 +353,7 @@ def index():
     # في حالة وجود جلسة تسجيل دخول
     if 'user_id' in session:
         try:
-            user = User.query.get(session['user_id'])
+            user = load_current_identity()
             if user:  # تأكد من أن المستخدم موجود
                 if user.user_type == 'admin':
                     return redirect(url_for('admin_dashboard'))
@@ -283,28 +442,33 @@ def profile():
         user.phone = phone
         
         db.session.commit()
+        if user.user_type == 'maintenance':
+            bump_reference_data_version()  # بيانات الفني تظهر في قوائم التعيين
         flash('تم تحديث الملف الشخصي بنجاح', 'success')
         return redirect(url_for('profile'))
     
     # إحصائيات للعرض في الملف الشخصي
     stats = {}
     if user.user_type == 'employee':
+        created = get_user_ticket_statistics('creator_status', user.id)
         stats = {
-            'created_tickets': user.tickets_created.count(),
-            'active_tickets': user.tickets_created.join(TicketStatus).filter(TicketStatus.name != 'مغلق').count(),
-            'resolved_tickets': user.tickets_created.join(TicketStatus).filter(TicketStatus.name == 'مكتمل').count()
+            'created_tickets': created['total'],
+            'active_tickets': created['active'],
+            'resolved_tickets': created['completed']
         }
     elif user.user_type == 'maintenance':
+        assigned = get_user_ticket_statistics('assignee_status', user.id)
         stats = {
-            'assigned_tickets': user.tickets_assigned.count(),
-            'active_tickets': user.tickets_assigned.join(TicketStatus).filter(TicketStatus.name != 'مغلق').count(),
-            'resolved_tickets': user.tickets_assigned.join(TicketStatus).filter(TicketStatus.name == 'مكتمل').count(),
-            'overdue_tickets': sum(1 for ticket in user.tickets_assigned if ticket.is_overdue())
+            'assigned_tickets': assigned['total'],
+            'active_tickets': assigned['active'],
+            'resolved_tickets': assigned['completed'],
+            'overdue_tickets': user.tickets_assigned.filter(Ticket.due_date < datetime.utcnow()).count()
         }
     elif user.user_type == 'admin':
+        ticket_stats = get_ticket_statistics()
         stats = {
-            'total_tickets': Ticket.query.count(),
-            'active_tickets': Ticket.query.join(TicketStatus).filter(TicketStatus.name != 'مغلق').count(),
+            'total_tickets': ticket_stats['total'],
+            'active_tickets': ticket_stats['open'],
             'users_count': User.query.count(),
             'categories_count': Category.query.count()
         }
@@ -347,9 +511,9 @@ def assign_ticket(ticket_id):
     ticket.assigned_to_id = maintenance_id
     
     # تغيير حالة البلاغ إلى قيد المعالجة
-    in_progress_status = TicketStatus.query.filter_by(name='قيد المعالجة').first()
-    if in_progress_status:
-        ticket.status_id = in_progress_status.id
+    in_progress_status_id = registry_status_id('in_progress')
+    if in_progress_status_id:
+        ticket.status_id = in_progress_status_id
     
     db.session.commit()
     
@@ -361,12 +525,13 @@ def assign_ticket(ticket_id):
 @login_required('employee')
 def create_ticket():
     """صفحة إنشاء بلاغ جديد للموظف"""
-    categories = Category.query.all()
-    departments = Department.query.all()
-    priorities = TicketPriority.query.all()
+    reference_data = get_reference_data()
+    categories = reference_data['categories']
+    departments = reference_data['departments']
+    priorities = reference_data['priorities']
     
     # الحصول على قائمة فنيي الصيانة لعرضها في القائمة المنسدلة
-    maintenance_staff = User.query.filter_by(user_type='maintenance').all()
+    maintenance_staff = reference_data['maintenance_staff']
     
     if request.method == 'POST':
         description = request.form.get('description')
@@ -414,18 +579,20 @@ def create_ticket():
                                   categories=categories, 
                                   priorities=priorities, 
                                   departments=departments,
-                                  maintenance_staff=maintenance_staff)
+                                  maintenance_staff=maintenance_staff,
+                                  taxonomy_json=taxonomy_json())
         
         # تغيير: جعل حالة البلاغ "جديد" دائماً بغض النظر عن تعيين فني أم لا
-        status = TicketStatus.query.filter_by(name='جديد').first()
+        new_status_id = registry_status_id('new')
         
-        if not status:
+        if not new_status_id:
             flash('خطأ في النظام: حالة البلاغ غير موجودة', 'error')
             return render_template('create_ticket.html', 
                                   categories=categories, 
                                   priorities=priorities, 
                                   departments=departments,
-                                  maintenance_staff=maintenance_staff)
+                                  maintenance_staff=maintenance_staff,
+                                  taxonomy_json=taxonomy_json())
         
         # إذا كان المستخدم قد اختار "بوقت محدد"
         if priority_id == 0 and custom_priority:
@@ -446,24 +613,18 @@ def create_ticket():
             due_date = datetime.utcnow() + timedelta(hours=custom_response_time)
             
             # تحديد أولوية منخفضة كقيمة افتراضية للحقل الخارجي
-            default_priority = TicketPriority.query.filter_by(name='منخفضة').first()
-            if not default_priority:
-                default_priority = TicketPriority.query.first()
+            default_priority_id = registry_priority_id('low')
+            if not default_priority_id:
+                default_priority_id = TicketPriority.query.first().id
             
             # استخدام معرف الأولوية الافتراضية في قاعدة البيانات
-            priority_id = default_priority.id
+            priority_id = default_priority_id
         else:
             # حساب الموعد النهائي بناءً على الأولوية المحددة
             due_date = calculate_due_date(priority_id)
         
         # إنشاء عنوان افتراضي للبلاغ إذا لم يتم توفيره
-        auto_title = f"{Category.query.get(category_id).name}"
-        if subcategory_id:
-            auto_title += f" - {SubCategory.query.get(subcategory_id).name}"
-        if department_id:
-            auto_title += f" - {Department.query.get(department_id).name}"
-            if section_id:
-                auto_title += f" - {Section.query.get(section_id).name}"
+        auto_title = build_ticket_title(category_id, subcategory_id, department_id, section_id)
         
         # إنشاء البلاغ الجديد
         ticket = Ticket(
@@ -476,7 +637,7 @@ def create_ticket():
             section_id=section_id,
             priority_id=priority_id,
             assigned_to_id=assigned_to_id,  # تعيين الفني المسؤول
-            status_id=status.id,
+            status_id=new_status_id,
             due_date=due_date,
             beneficiary_id=beneficiary_id,  # تعيين المستفيد
             contact_method=contact_method  # إضافة طريقة استلام البلاغ
@@ -555,7 +716,8 @@ def create_ticket():
                           categories=categories, 
                           priorities=priorities, 
                           departments=departments,
-                          maintenance_staff=maintenance_staff))
+                          maintenance_staff=maintenance_staff,
+                          taxonomy_json=taxonomy_json()))
     
     # إضافة ترويسات التحكم بالتخزين المؤقت
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0'
@@ -612,10 +774,8 @@ def edit_ticket(ticket_id):
     # معالجة الأولوية المخصصة
     if priority_id == '0' and custom_priority:
         # التأكد من وجود أولوية بوقت محدد
-        custom_priority_obj = ensure_custom_priority_exists()
-        
         # تعيين أولوية البلاغ إلى "بوقت محدد"
-        priority_id = custom_priority_obj.id
+        priority_id = ensure_custom_priority_id()
         
         # حساب الموعد النهائي بناءً على عدد الأيام المحددة
         custom_days = int(custom_priority)
@@ -641,13 +801,7 @@ def edit_ticket(ticket_id):
     ticket.contact_method = contact_method  # تحديث طريقة استلام البلاغ
     
     # إنشاء عنوان افتراضي للبلاغ إذا لم يتم توفيره
-    auto_title = f"{Category.query.get(category_id).name}"
-    if subcategory_id:
-        auto_title += f" - {SubCategory.query.get(subcategory_id).name}"
-    if department_id:
-        auto_title += f" - {Department.query.get(department_id).name}"
-        if section_id:
-            auto_title += f" - {Section.query.get(section_id).name}"
+    auto_title = build_ticket_title(category_id, subcategory_id, department_id, section_id)
             
     ticket.title = auto_title
     
@@ -713,19 +867,24 @@ def view_ticket(ticket_id):
     # الحصول على المرفقات
     attachments = ticket.attachments.order_by(Attachment.upload_date.desc()).all()
     
+    # ملفات نماذج الصيانة التي لم تُرفق بعد (قيد الإنشاء أو فشل إنشاؤها)
+    form_jobs = ticket_form_jobs(ticket_id)
+    
     # الحصول على فنيي الصيانة للتعيين (للمدير فقط)
+    reference_data = get_reference_data()
     maintenance_staff = []
     if current_user.user_type == 'admin':
-        maintenance_staff = User.query.filter_by(user_type='maintenance').all()
+        maintenance_staff = reference_data['maintenance_staff']
     
     # الحصول على الحالات المتاحة لتحديث الحالة
-    statuses = TicketStatus.query.all()
+    statuses = reference_data['statuses']
     
     return render_template(
         'view_ticket.html',
         ticket=ticket,
         comments=comments,
         attachments=attachments,
+        form_jobs=form_jobs,
         maintenance_staff=maintenance_staff,
         statuses=statuses
     )
@@ -815,12 +974,13 @@ def change_status(ticket_id):
 # تعديل مسار maintenance_dashboard ليشمل البلاغات المتأخرة
 @app.route('/maintenance/dashboard')
 @login_required('maintenance')
+@read_replica
 def maintenance_dashboard():
     """لوحة تحكم فني الصيانة لعرض البلاغات المسندة إليه"""
     current_user = get_current_user()
     
     # البلاغات المسندة
-    assigned_tickets = Ticket.query.filter_by(assigned_to_id=current_user.id).all()
+    assigned_tickets = ticket_listing_query('maintenance_dashboard').filter_by(assigned_to_id=current_user.id).all()
     
     # تصنيف البلاغات حسب الحالة
     new_tickets = []
@@ -838,24 +998,20 @@ def maintenance_dashboard():
     
     for ticket in assigned_tickets:
         # تصنيف حسب الحالة
-        if ticket.status.name == 'جديد':
+        ticket_status = status_code(ticket.status_id)
+        if ticket_status == 'new':
             new_tickets.append(ticket)
-        elif ticket.status.name == 'قيد المعالجة':
+        elif ticket_status == 'in_progress':
             in_progress_tickets.append(ticket)
-        elif ticket.status.name == 'مكتمل':
+        elif ticket_status == 'completed':
             completed_tickets.append(ticket)
-        elif ticket.status.name == 'مغلق':
+        elif ticket_status == 'closed':
             closed_tickets += 1
         
         # تصنيف حسب الأولوية
-        if ticket.priority.name == 'عالية':
-            priorities_count['high'] += 1
-        elif ticket.priority.name == 'متوسطة':
-            priorities_count['medium'] += 1
-        elif ticket.priority.name == 'منخفضة':
-            priorities_count['low'] += 1
-        elif ticket.priority.is_custom:
-            priorities_count['custom'] += 1
+        ticket_priority = priority_code(ticket.priority_id)
+        if ticket_priority in priorities_count:
+            priorities_count[ticket_priority] += 1
     
     # الحصول على البلاغات المتأخرة المسندة لهذا الفني
     # فقط البلاغات الجديدة وقيد المعالجة (وليست المكتملة أو المغلقة)
@@ -907,15 +1063,16 @@ def setup_api():
                 return jsonify({'status': 'info', 'message': 'تم إعداد قاعدة البيانات مسبقاً'})
         except:
             # تجاهل الخطأ - هذا متوقع إذا لم تكن الجداول موجودة
-            pass
+            # (PostgreSQL تلغي المعاملة بعد الخطأ لذلك يجب التراجع عنها قبل المتابعة)
+            db.session.rollback()
         
         # إعادة إنشاء قاعدة البيانات
         try:
-            db.drop_all()  # حذف جميع الجداول القديمة إن وجدت
+            db.drop_all(bind_key=None)  # حذف جميع الجداول القديمة إن وجدت (القاعدة الرئيسية فقط وليس نسخة القراءة)
         except:
             pass  # تجاهل الخطأ إذا لم تكن هناك جداول لحذفها
             
-        db.create_all()  # إنشاء الجداول من جديد
+        db.create_all(bind_key=None)  # إنشاء الجداول من جديد
         
         # إنشاء مجلد التحميلات إذا لم يكن موجودًا
         upload_dir = os.path.join(basedir, 'uploads')
@@ -1060,6 +1217,7 @@ def setup_api():
         
         db.session.add_all([ticket1, ticket2])
         db.session.commit()
+        bump_reference_data_version()
         
         return jsonify({'status': 'success', 'message': 'تم إعداد قاعدة البيانات بنجاح'})
         
@@ -1074,20 +1232,21 @@ def inject_common_data():
     try:
         # نحاول الحصول على البيانات من قاعدة البيانات
         data = {
-            'get_current_user': get_current_user,
+            'get_current_user': load_current_identity,
             'now': datetime.now()
         }
         
         # التحقق من طريق المتصفح - إذا كان مسار الإعداد، لا نحتاج لبيانات قاعدة البيانات
         if request.path != '/setup' and request.path != '/setup_api':
-            data['categories'] = Category.query.all()
-            data['departments'] = Department.query.all()
+            reference_data = get_reference_data()
+            data['categories'] = reference_data['categories']
+            data['departments'] = reference_data['departments']
         
         return data
     except:
         # في حالة وجود خطأ (مثل عدم وجود الجداول)، نعيد فقط البيانات الأساسية
         return {
-            'get_current_user': get_current_user,
+            'get_current_user': load_current_identity,
             'now': datetime.now(),
             'categories': [],
             'departments': []
@@ -1103,7 +1262,11 @@ def setup_api_route():
 # إضافة دالة لتوفير المستخدم الحالي في قوالب الصفحات
 @app.context_processor
 def inject_user():
-    return dict(get_current_user=get_current_user)
+    try:
+        current_user = load_current_identity()
+    except Exception:
+        current_user = None
+    return dict(get_current_user=load_current_identity, current_user=current_user)
 
 
 # إضافة دالة لتوفير متغير now في قوالب الصفحات
@@ -1143,6 +1306,7 @@ def admin_add_user():
     
     db.session.add(user)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم إضافة المستخدم بنجاح', 'success')
     return redirect(url_for('admin_users'))
@@ -1180,6 +1344,7 @@ def admin_edit_user():
         user.password = password
     
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم تحديث بيانات المستخدم بنجاح', 'success')
     return redirect(url_for('admin_users'))
@@ -1202,135 +1367,194 @@ def admin_delete_user():
     # حذف المستخدم
     db.session.delete(user)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم حذف المستخدم بنجاح', 'success')
     return redirect(url_for('admin_users'))
 
 def get_dashboard_statistics():
     """الحصول على إحصائيات البلاغات حسب الحالة والأولوية"""
-    
-    # إحصائيات حسب الحالة
-    statuses = TicketStatus.query.all()
-    statuses_count = {
-        'new': 0,
-        'in_progress': 0,
-        'completed': 0,
-        'closed': 0
-    }
-    
-    for status in statuses:
-        if status.name == 'جديد':
-            statuses_count['new'] = status.tickets.count()
-        elif status.name == 'قيد المعالجة':
-            statuses_count['in_progress'] = status.tickets.count()
-        elif status.name == 'مكتمل':
-            statuses_count['completed'] = status.tickets.count()
-        elif status.name == 'مغلق':
-            statuses_count['closed'] = status.tickets.count()
-    
-    # إحصائيات حسب الأولوية
-    priorities = TicketPriority.query.all()
-    priorities_count = {
-        'high': 0,
-        'medium': 0,
-        'low': 0,
-        'custom': 0
-    }
-    
-    for priority in priorities:
-        if priority.name == 'عالية':
-            priorities_count['high'] = priority.tickets.count()
-        elif priority.name == 'متوسطة':
-            priorities_count['medium'] = priority.tickets.count()
-        elif priority.name == 'منخفضة':
-            priorities_count['low'] = priority.tickets.count()
-        elif priority.is_custom:  # تحقق باستخدام الحقل الجديد is_custom
-            priorities_count['custom'] = priority.tickets.count()
-    
-    return statuses_count, priorities_count
+    stats = get_ticket_statistics()
+    return stats['statuses_count'], stats['priorities_count']
 
 
 
 # إضافة دالة للحصول على البلاغات المتأخرة وعدد أيام التأخير
-def get_overdue_tickets(tickets=None):
-    """الحصول على البلاغات المتأخرة وحساب عدد أيام التأخير"""
+def get_overdue_tickets(tickets=None, limit=None, query=None):
+    """
+    الحصول على البلاغات المتأخرة وحساب عدد أيام التأخير
+    
+    Args:
+        tickets: قائمة بلاغات محملة مسبقاً لفحصها في الذاكرة (اختياري)
+        limit: الحد الأقصى لعدد البلاغات المعادة (الأكثر تأخيراً أولاً)
+        query: استعلام أساسي للتصفية عند البحث في قاعدة البيانات (اختياري)
+    """
     overdue_tickets = []
     overdue_days = {}
-    
-    # إذا لم يتم توفير قائمة البلاغات، نستخدم جميع البلاغات المفتوحة
-    if tickets is None:
-        # الحصول على البلاغات المفتوحة (غير مغلقة أو مكتملة)
-        open_statuses = TicketStatus.query.filter(~TicketStatus.name.in_(['مغلق', 'مكتمل'])).all()
-        status_ids = [status.id for status in open_statuses]
-        
-        tickets = Ticket.query.filter(Ticket.status_id.in_(status_ids)).all()
-    
     now = datetime.utcnow()
     
-    for ticket in tickets:
-        if ticket.is_overdue():
-            overdue_tickets.append(ticket)
-            
-            # حساب عدد أيام التأخير
-            if ticket.due_date:
+    # إذا تم توفير قائمة البلاغات، نفحصها مباشرة دون استعلامات إضافية
+    if tickets is not None:
+        for ticket in tickets:
+            if ticket.is_overdue():
+                overdue_tickets.append(ticket)
+                
+                # حساب عدد أيام التأخير
                 time_diff = now - ticket.due_date
-                days_late = max(0, time_diff.days)  # لضمان عدم ظهور أيام سالبة
-                overdue_days[ticket.id] = days_late
-    
-    # ترتيب البلاغات المتأخرة حسب عدد أيام التأخير (الأكثر تأخيراً أولاً)
-    overdue_tickets.sort(key=lambda x: overdue_days.get(x.id, 0), reverse=True)
+                overdue_days[ticket.id] = max(0, time_diff.days)  # لضمان عدم ظهور أيام سالبة
+        
+        # ترتيب البلاغات المتأخرة حسب عدد أيام التأخير (الأكثر تأخيراً أولاً)
+        overdue_tickets.sort(key=lambda x: overdue_days.get(x.id, 0), reverse=True)
+        if limit:
+            overdue_tickets = overdue_tickets[:limit]
+        return overdue_tickets, overdue_days
+    
+    # التصفية والترتيب وحساب أيام التأخير داخل قاعدة البيانات
+    overdue_query = overdue_tickets_query(now, query)
+    if limit:
+        overdue_query = overdue_query.limit(limit)
+    
+    for row in overdue_query.all():
+        if isinstance(row, Ticket):
+            ticket, days_late = row, (now - row.due_date).days
+        else:
+            ticket, days_late = row
+        overdue_tickets.append(ticket)
+        overdue_days[ticket.id] = max(0, days_late)
     
     return overdue_tickets, overdue_days
 
+
+def count_overdue_tickets(query=None):
+    """عدد البلاغات المفتوحة المتأخرة دون تحميلها"""
+    if query is None:
+        query = Ticket.query
+    return query.filter(
+        open_tickets_filter(),
+        Ticket.due_date.isnot(None),
+        Ticket.due_date < datetime.utcnow()
+    ).count()
+
+
+CURSOR_TIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def encode_ticket_cursor(ticket):
+    """تحويل موضع البلاغ (تاريخ الإنشاء، المعرف) إلى مؤشر نصي للصفحات"""
+    return f"{ticket.created_at.strftime(CURSOR_TIME_FORMAT)}-{ticket.id}"
+
+
+def decode_ticket_cursor(cursor):
+    """قراءة المؤشر النصي وإرجاع (تاريخ الإنشاء، المعرف) أو None إذا كان غير صالح"""
+    if not cursor:
+        return None
+    try:
+        created_part, id_part = cursor.split('-', 1)
+        return datetime.strptime(created_part, CURSOR_TIME_FORMAT), int(id_part)
+    except (ValueError, TypeError):
+        return None
+
+
+def paginate_tickets(tickets_query, cursor=None, direction='next', page_size=None):
+    """
+    تقسيم البلاغات إلى صفحات باستخدام المؤشرات على (created_at, id) بدلاً من OFFSET
+    
+    الترتيب دائماً من الأحدث إلى الأقدم. direction='next' تعني الصفحة الأقدم بعد المؤشر،
+    و direction='prev' تعني الصفحة الأحدث قبل المؤشر.
+    
+    Returns:
+        tuple: (البلاغات، مؤشر الصفحة السابقة، مؤشر الصفحة التالية)
+    """
+    if not page_size:
+        page_size = app.config['TICKETS_PAGE_SIZE']
+    page_size = max(1, min(page_size, app.config['TICKETS_MAX_PAGE_SIZE']))
+    
+    position = decode_ticket_cursor(cursor)
+    backwards = position is not None and direction == 'prev'
+    
+    if position:
+        created_at, ticket_id = position
+        if backwards:
+            tickets_query = tickets_query.filter(db.or_(
+                Ticket.created_at > created_at,
+                db.and_(Ticket.created_at == created_at, Ticket.id > ticket_id)
+            ))
+        else:
+            tickets_query = tickets_query.filter(db.or_(
+                Ticket.created_at < created_at,
+                db.and_(Ticket.created_at == created_at, Ticket.id < ticket_id)
+            ))
+    
+    if backwards:
+        tickets_query = tickets_query.order_by(Ticket.created_at.asc(), Ticket.id.asc())
+    else:
+        tickets_query = tickets_query.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    
+    # جلب عنصر إضافي لمعرفة وجود صفحة أخرى في نفس الاتجاه
+    tickets = tickets_query.limit(page_size + 1).all()
+    has_more = len(tickets) > page_size
+    tickets = tickets[:page_size]
+    
+    if backwards:
+        tickets.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = position is not None, has_more
+    
+    prev_cursor = encode_ticket_cursor(tickets[0]) if tickets and has_prev else None
+    next_cursor = encode_ticket_cursor(tickets[-1]) if tickets and has_next else None
+    
+    return tickets, prev_cursor, next_cursor
+
+
 # تعديل مسار admin_dashboard ليشمل البلاغات المتأخرة
 @app.route('/admin/dashboard')
 @login_required('admin')
+@read_replica
 def admin_dashboard():
     """لوحة تحكم الإدارة لعرض جميع البلاغات وتوزيعها حسب الأهمية"""
-    priority_filter = request.args.get('priority', type=int)
-    status_filter = request.args.get('status', type=int)
-    category_filter = request.args.get('category', type=int)
-    
-    tickets_query = Ticket.query
-    
-    if priority_filter:
-        tickets_query = tickets_query.filter_by(priority_id=priority_filter)
-    
-    if status_filter:
-        tickets_query = tickets_query.filter_by(status_id=status_filter)
-        
-    if category_filter:
-        tickets_query = tickets_query.filter_by(category_id=category_filter)
-    
-    tickets = tickets_query.order_by(Ticket.created_at.desc()).all()
+    filters = dashboard_filters(request.args)
+    priority_filter = filters['priority']
+    status_filter = filters['status']
+    category_filter = filters['category']
+    cursor = request.args.get('cursor')
+    direction = request.args.get('direction', 'next')
+    per_page = request.args.get('per_page', type=int)
+    
+    # نفس التصفية يستخدمها تصدير نماذج الصيانة من هذه الصفحة
+    tickets_query = dashboard_tickets_query(filters)
+    
+    # عدد البلاغات المطابقة للتصفية في الجدول كاملاً وليس في الصفحة الحالية فقط
+    filtered_tickets_count = tickets_query.count()
+    
+    tickets, prev_cursor, next_cursor = paginate_tickets(
+        ticket_listing_query('admin_dashboard', tickets_query), cursor, direction, per_page
+    )
     
-    # إحصائيات البلاغات
-    total_tickets = Ticket.query.count()
-    open_tickets = Ticket.query.join(TicketStatus).filter(TicketStatus.name != 'مغلق').count()
-    high_priority = Ticket.query.filter_by(priority_id=1).count()  # نفترض أن الأولوية العالية هي 1
-    completed_tickets = Ticket.query.join(TicketStatus).filter(TicketStatus.name == 'مكتمل').count()
+    # إحصائيات البلاغات من جدول العدادات
+    stats = get_ticket_statistics()
     
-    # الحصول على البلاغات المتأخرة وعدد أيام التأخير
-    overdue_tickets, overdue_days = get_overdue_tickets()
+    # الحصول على البلاغات الأكثر تأخيراً وعدد أيام التأخير، مع العدد الكلي للمتأخرة
+    overdue_tickets, overdue_days = get_overdue_tickets(limit=app.config['OVERDUE_LIST_LIMIT'])
+    overdue_count = count_overdue_tickets()
     
     # الحصول على قوائم التصفية
-    priorities = TicketPriority.query.all()
-    statuses = TicketStatus.query.all()
-    categories = Category.query.all()
+    reference_data = get_reference_data()
+    priorities = reference_data['priorities']
+    statuses = reference_data['statuses']
+    categories = reference_data['categories']
     
     # تجميع ألوان الأولويات
     priority_colors = {}
     for priority in priorities:
-        if priority.name == 'عالية':
+        code = priority_code(priority.id)
+        if code == 'high':
             priority_colors['high'] = priority.color or '#e74a3b'
-        elif priority.name == 'متوسطة':
+        elif code == 'medium':
             priority_colors['medium'] = priority.color or '#f6c23e'
-        elif priority.name == 'منخفضة':
+        elif code == 'low':
             priority_colors['low'] = priority.color or '#1cc88a'
     
-    # الحصول على إحصائيات لوحة المعلومات
-    statuses_count, priorities_count = get_dashboard_statistics()
-    
     return render_template(
         'admin_dashboard.html',
         tickets=tickets,
@@ -1340,15 +1564,20 @@ def admin_dashboard():
         current_priority=priority_filter,
         current_status=status_filter,
         current_category=category_filter,
-        total_tickets=total_tickets,
-        open_tickets=open_tickets,
-        high_priority=high_priority,
-        completed_tickets=completed_tickets,
+        per_page=per_page,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
+        filtered_tickets_count=filtered_tickets_count,
+        total_tickets=stats['total'],
+        open_tickets=stats['open'],
+        high_priority=stats['high_priority'],
+        completed_tickets=stats['completed'],
         priority_colors=priority_colors,
-        statuses_count=statuses_count,
-        priorities_count=priorities_count,
+        statuses_count=stats['statuses_count'],
+        priorities_count=stats['priorities_count'],
         overdue_tickets=overdue_tickets,
-        overdue_days=overdue_days
+        overdue_days=overdue_days,
+        overdue_count=overdue_count
     )
 
 
@@ -1377,10 +1606,8 @@ def admin_edit_ticket():
     # معالجة الأولوية
     if priority_id == '0' and custom_priority:  # إذا تم اختيار "بوقت محدد"
         # التأكد من وجود أولوية بوقت محدد
-        custom_priority_obj = ensure_custom_priority_exists()
-        
         # تعيين أولوية البلاغ إلى "بوقت محدد"
-        ticket.priority_id = custom_priority_obj.id
+        ticket.priority_id = ensure_custom_priority_id()
         
         # حساب الموعد النهائي
         custom_days = int(custom_priority)
@@ -1465,6 +1692,7 @@ def admin_add_category():
     category = Category(name=name)
     db.session.add(category)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم إضافة التصنيف بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -1488,6 +1716,7 @@ def admin_edit_category():
     # تحديث اسم التصنيف
     category.name = name
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم تحديث التصنيف بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -1513,11 +1742,13 @@ def admin_delete_category():
         # نقل البلاغات إلى التصنيف البديل
         # تعديل هنا: نستخدم التحديث المباشر بدلاً من الحلقة
         Ticket.query.filter_by(category_id=category_id).update({'category_id': replacement_category_id})
+        move_rollup_category(category_id, replacement_category_id)  # التحديث الجماعي لا يمر عبر أحداث العدادات
         db.session.flush()  # تنفيذ عمليات التحديث قبل الحذف
     
     # حذف التصنيف
     db.session.delete(category)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم حذف التصنيف بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -1526,44 +1757,48 @@ def admin_delete_category():
 # تعديل مسار admin_report لإضافة المعلومات الإحصائية للبلاغات
 @app.route('/admin/report')
 @login_required('admin')
+@read_replica
 def admin_report():
     """صفحة تقارير النظام"""
     # استقبال مرشحات التقرير
-    date_range = request.args.get('date_range', type=int, default=30)  # الافتراضي 30 يوم
-    selected_category = request.args.get('category', type=int)
-    selected_user = request.args.get('user', type=int)
-    selected_priority = request.args.get('priority', type=int)
-    
-    # تحديد تاريخ بداية التقرير
-    start_date = datetime.utcnow() - timedelta(days=date_range)
-    
-    # استعلام البلاغات حسب المرشحات
-    tickets_query = Ticket.query.filter(Ticket.created_at >= start_date)
-    
-    if selected_category:
-        tickets_query = tickets_query.filter_by(category_id=selected_category)
-    
-    if selected_user:
-        tickets_query = tickets_query.filter(
-            db.or_(
-                Ticket.created_by_id == selected_user,
-                Ticket.assigned_to_id == selected_user
-            )
-        )
-    
-    if selected_priority:
-        tickets_query = tickets_query.filter_by(priority_id=selected_priority)
-    
-    tickets = tickets_query.all()
+    params = report_params_from_request(request.args)
+    date_range = params['date_range']
     
     # جلب الفلاتر لعرضها في الواجهة
-    categories = Category.query.all()
+    reference_data = get_reference_data()
+    categories = reference_data['categories']
     users = User.query.all()
-    priorities = TicketPriority.query.all()
-    statuses = TicketStatus.query.all()
-    
-    # البيانات المستخدمة في الرسوم البيانية
-    report_data = generate_report_data(tickets, date_range, statuses, categories)
+    priorities = reference_data['priorities']
+    statuses = reference_data['statuses']
+    
+    # البيانات المستخدمة في الرسوم البيانية (من الذاكرة المؤقتة إن وجدت لنفس المرشحات)
+    cache_key = report_cache_key(**params)
+    report_data = get_cached_report(cache_key)
+    
+    # نتيجة مهمة خلفية منتهية لنفس المرشحات (من القاعدة الرئيسية: صفحة المتابعة رأت المهمة منتهية
+    # هناك، وقد لا تكون وصلت إلى النسخة بعد فتُعاد المهمة من جديد)
+    job_id = request.args.get('job')
+    if report_data is None and job_id:
+        with primary_reads():
+            job = ReportJob.query.get(job_id)
+        if job and report_job_status(job)['params'] == params:
+            report_data = report_job_result(job)
+            if report_data is not None:
+                store_report(cache_key, report_data)
+    
+    # الفترات الطويلة تُحسب في الخلفية وتعرض الصفحة نسبة الإنجاز حتى انتهائها
+    report_pending = False
+    if report_data is None:
+        background = request.args.get('mode') == 'background' or date_range >= app.config['REPORT_BACKGROUND_MIN_DAYS']
+        if background and request.args.get('mode') != 'sync':
+            report_pending = True
+        else:
+            report_data = generate_report_data(
+                date_range, statuses, categories, priorities,
+                category_id=params['category_id'], user_id=params['user_id'], priority_id=params['priority_id'],
+                granularity=params['granularity']
+            )
+            store_report(cache_key, report_data)
     
     # الحصول على إحصائيات لوحة المعلومات
     statuses_count, priorities_count = get_dashboard_statistics()
@@ -1571,54 +1806,165 @@ def admin_report():
     return render_template(
         'admin_report.html',
         date_range=date_range,
-        selected_category=selected_category,
-        selected_user=selected_user,
-        selected_priority=selected_priority,
+        selected_category=params['category_id'],
+        selected_user=params['user_id'],
+        selected_priority=params['priority_id'],
+        granularity=params['granularity'],
         categories=categories,
         users=users,
         priorities=priorities,
         report_data=report_data,
+        report_pending=report_pending,
+        report_params=params,
         statuses_count=statuses_count,
         priorities_count=priorities_count
     )
 
-def generate_report_data(tickets, date_range, statuses, categories):
-    """توليد بيانات التقرير من البلاغات"""
+
+def report_params_from_request(args):
+    """قراءة مرشحات التقرير من الطلب وتوحيدها (نفس الشكل لمفتاح الذاكرة المؤقتة ومهام الخلفية)"""
+    date_range = args.get('date_range', type=int, default=30)  # الافتراضي 30 يوم
+    granularity = args.get('granularity')
+    if granularity not in TIMELINE_GRANULARITIES:
+        granularity = default_timeline_granularity(date_range)
+    
+    return {
+        'date_range': date_range,
+        'category_id': args.get('category', type=int) or None,
+        'user_id': args.get('user', type=int) or None,
+        'priority_id': args.get('priority', type=int) or None,
+        'granularity': granularity
+    }
+
+
+def compute_report_job(params, progress):
+    """حساب بيانات التقرير داخل مهمة خلفية (القراءة من نسخة القراءة إن وُجدت)"""
+    reference_data = get_reference_data()
+    with replica_reads():
+        report_data = generate_report_data(
+            params['date_range'],
+            reference_data['statuses'],
+            reference_data['categories'],
+            reference_data['priorities'],
+            category_id=params['category_id'],
+            user_id=params['user_id'],
+            priority_id=params['priority_id'],
+            granularity=params['granularity'],
+            progress=progress
+        )
+    store_report(report_cache_key(**params), report_data)
+    return report_data
+
+
+@app.route('/admin/report/jobs', methods=['POST'])
+@login_required('admin')
+def admin_report_job_create():
+    """بدء توليد تقرير في الخلفية وإعادة معرف المهمة"""
+    params = report_params_from_request(request.form)
+    try:
+        job = submit_report_job(params, compute_report_job, user_id=session.get('user_id'))
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"خطأ في إنشاء مهمة التقرير: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'حدث خطأ أثناء بدء توليد التقرير'}), 500
+    
+    job_status = report_job_status(job)
+    job_status['status_url'] = url_for('admin_report_job_status', job_id=job.id)
+    return jsonify(job_status), 202
+
+
+@app.route('/admin/report/jobs/<job_id>')
+@login_required('admin')
+def admin_report_job_status(job_id):
+    """حالة مهمة التقرير ونسبة إنجازها، مع بيانات التقرير عند الانتهاء"""
+    job = ReportJob.query.get(job_id)
+    if not job:
+        return jsonify({'status': 'error', 'message': 'المهمة غير موجودة'}), 404
+    
+    job_status = report_job_status(job)
+    if job_status['status'] == 'done':
+        job_status['result'] = report_job_result(job)
+        params = job_status['params']
+        job_status['report_url'] = url_for(
+            'admin_report', date_range=params['date_range'], category=params['category_id'],
+            user=params['user_id'], priority=params['priority_id'], granularity=params['granularity'], job=job.id
+        )
+    return jsonify(job_status)
+
+
+@app.route('/admin/report/cache')
+@login_required('admin')
+def admin_report_cache_stats():
+    """إحصائيات الذاكرة المؤقتة لصفحة التقارير"""
+    return jsonify(report_cache_stats())
+
+def generate_report_data(date_range, statuses, categories, priorities, category_id=None, user_id=None, priority_id=None,
+                         granularity=None, progress=None):
+    """
+    توليد بيانات التقرير للفترة المحددة
+    
+    يعتمد على صفوف التجميع اليومي (اليوم × التصنيف × الحالة × الأولوية × الفني) بدلاً
+    من تحميل البلاغات، لذلك لا تزيد كلفة التقرير مع طول الفترة إلا بعدد الأيام.
+    """
+    start_date = datetime.utcnow() - timedelta(days=date_range)
+    rows = report_rows(start_date, category_id, user_id, priority_id)
+    if progress:
+        progress(40)
+    
+    completed_status_id = registry_status_id('completed')
+    closed_status_id = registry_status_id('closed')
+    response_times = {priority.id: priority.response_time or 0 for priority in priorities}
+    
     # الإحصائيات الأساسية
-    total_tickets = len(tickets)
-    completed_tickets = sum(1 for ticket in tickets if ticket.status.name == 'مكتمل')
-    overdue_tickets = sum(1 for ticket in tickets if ticket.is_overdue())
+    total_tickets = 0
+    completed_tickets = 0
+    open_tickets = 0
+    response_time_total = 0
+    status_totals = {}
+    category_totals = {}
+    day_totals = {}
+    
+    for day, row_category_id, status_id, row_priority_id, assignee_id, count in rows:
+        total_tickets += count
+        if status_id == completed_status_id:
+            completed_tickets += count
+        if status_id != closed_status_id:
+            open_tickets += count
+        response_time_total += response_times.get(row_priority_id, 0) * count
+        status_totals[status_id] = status_totals.get(status_id, 0) + count
+        category_totals[row_category_id] = category_totals.get(row_category_id, 0) + count
+        day_totals[day] = day_totals.get(day, 0) + count
+    
+    overdue_tickets = report_overdue_count(start_date, category_id, user_id, priority_id)
+    if progress:
+        progress(60)
     
     # حساب معدل الإكمال
     completion_rate = 0 if total_tickets == 0 else round((completed_tickets / total_tickets) * 100)
     
     # حساب متوسط وقت الاستجابة (بالساعات)
-    response_times = [ticket.priority.response_time for ticket in tickets]
-    avg_response_time = 0 if len(response_times) == 0 else round(sum(response_times) / len(response_times), 1)
+    avg_response_time = 0 if total_tickets == 0 else round(response_time_total / total_tickets, 1)
     
     # حساب معدل التأخير
-    open_tickets = sum(1 for ticket in tickets if ticket.status.name != 'مغلق')
     overdue_rate = 0 if open_tickets == 0 else round((overdue_tickets / open_tickets) * 100)
     
     # بيانات الرسم البياني للحالات
     status_names = [status.name for status in statuses]
-    status_counts = []
-    for status in statuses:
-        count = sum(1 for ticket in tickets if ticket.status_id == status.id)
-        status_counts.append(count)
+    status_counts = [status_totals.get(status.id, 0) for status in statuses]
     
     # بيانات الرسم البياني للتصنيفات
     category_names = [category.name for category in categories]
-    category_counts = []
-    for category in categories:
-        count = sum(1 for ticket in tickets if ticket.category_id == category.id)
-        category_counts.append(count)
+    category_counts = [category_totals.get(category.id, 0) for category in categories]
     
     # إنشاء البيانات الزمنية للبلاغات
-    timeline_labels, timeline_counts = generate_timeline_data(tickets, date_range)
+    timeline_labels, timeline_counts = generate_timeline_data(day_totals, date_range, granularity)
+    if progress:
+        progress(70)
     
     # بيانات أداء فنيي الصيانة
-    technicians = generate_technician_performance(tickets)
+    technicians = generate_technician_performance(
+        technician_performance_rows(start_date, category_id, user_id, priority_id)
+    )
     
     return {
         'total_tickets': total_tickets,
@@ -1637,75 +1983,80 @@ def generate_report_data(tickets, date_range, statuses, categories):
     }
 
 
-def generate_timeline_data(tickets, date_range):
-    """توليد بيانات الجدول الزمني للبلاغات"""
+# دقة المخطط الزمني المتاحة في صفحة التقارير
+TIMELINE_GRANULARITIES = ('day', 'week', 'month')
+
+
+def default_timeline_granularity(date_range):
+    """الدقة الافتراضية للمخطط الزمني: يومي حتى 30 يوماً ثم أسبوعي"""
+    return 'day' if date_range <= 30 else 'week'
+
+
+def _timeline_bucket(day, today, granularity):
+    """أول يوم في فترة المخطط الزمني التي يقع فيها اليوم المحدد"""
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        # الأسابيع متتالية تنتهي باليوم الحالي
+        return day - timedelta(days=6 - (today - day).days % 7)
+    return day
+
+
+def generate_timeline_data(day_totals, date_range, granularity=None):
+    """
+    توليد بيانات الجدول الزمني للبلاغات من عدد البلاغات لكل يوم
+    
+    يتم توزيع الأيام على فترات يومية أو أسبوعية أو شهرية في مرور واحد، وتكون
+    التسمية تاريخ بداية الفترة (أو الشهر بصيغة YYYY-MM).
+    """
+    if granularity not in TIMELINE_GRANULARITIES:
+        granularity = default_timeline_granularity(date_range)
+    
     today = datetime.utcnow().date()
     
-    # تحديد نوع المخطط الزمني بناءً على الفترة المختارة
-    if date_range <= 30:
-        # عرض كل يوم
-        days = [today - timedelta(days=i) for i in range(date_range)]
-        days.reverse()
-        labels = [day.strftime('%Y-%m-%d') for day in days]
-        
-        counts = []
-        for day in days:
-            day_start = datetime.combine(day, datetime.min.time())
-            day_end = datetime.combine(day, datetime.max.time())
-            count = sum(1 for ticket in tickets if day_start <= ticket.created_at <= day_end)
-            counts.append(count)
-    else:
-        # عرض كل أسبوع
+    # تحديد فترات المخطط الزمني من الأقدم إلى الأحدث
+    if granularity == 'day':
+        buckets = [today - timedelta(days=i) for i in range(date_range - 1, -1, -1)]
+        label_format = '%Y-%m-%d'
+    elif granularity == 'week':
         weeks = date_range // 7
         if date_range % 7 > 0:
             weeks += 1
-            
-        week_dates = [today - timedelta(days=i*7) for i in range(weeks)]
-        week_dates.reverse()
-        
-        labels = [f"أسبوع {i+1}" for i in range(len(week_dates))]
-        
-        counts = []
-        for i, week_date in enumerate(week_dates):
-            week_start = datetime.combine(week_date - timedelta(days=6), datetime.min.time())
-            week_end = datetime.combine(week_date, datetime.max.time())
-            count = sum(1 for ticket in tickets if week_start <= ticket.created_at <= week_end)
-            counts.append(count)
+        buckets = [today - timedelta(days=i * 7 + 6) for i in range(weeks - 1, -1, -1)]
+        label_format = '%Y-%m-%d'
+    else:
+        month = _timeline_bucket(today - timedelta(days=date_range), today, 'month')
+        buckets = []
+        while month <= today:
+            buckets.append(month)
+            month = (month + timedelta(days=32)).replace(day=1)
+        label_format = '%Y-%m'
+    
+    counts_by_bucket = dict.fromkeys(buckets, 0)
+    for day, count in day_totals.items():
+        bucket = _timeline_bucket(day, today, granularity)
+        if bucket in counts_by_bucket:
+            counts_by_bucket[bucket] += count
+    
+    labels = [bucket.strftime(label_format) for bucket in buckets]
+    counts = [counts_by_bucket[bucket] for bucket in buckets]
     
     return labels, counts
 
 
-def generate_technician_performance(tickets):
-    """توليد بيانات أداء فنيي الصيانة"""
+def generate_technician_performance(technician_rows):
+    """توليد بيانات أداء فنيي الصيانة من صفوف الإحصائيات المجمعة لكل فني"""
     # جمع البلاغات حسب الفني
     tech_data = {}
-    
-    # الفنيون الذين لديهم بلاغات مسندة
-    maintenance_users = User.query.filter_by(user_type='maintenance').all()
-    
-    for user in maintenance_users:
-        tech_data[user.id] = {
-            'name': user.name,
-            'assigned': 0,
-            'completed': 0,
-            'overdue': 0,
-            'response_times': []
+    for tech_id, name, assigned, completed, overdue, response_time_total in technician_rows:
+        tech_data[tech_id] = {
+            'name': name,
+            'assigned': assigned,
+            'completed': completed,
+            'overdue': overdue,
+            'response_time_total': response_time_total
         }
     
-    # حساب الإحصائيات لكل فني
-    for ticket in tickets:
-        if ticket.assigned_to_id and ticket.assigned_to_id in tech_data:
-            tech_id = ticket.assigned_to_id
-            tech_data[tech_id]['assigned'] += 1
-            
-            if ticket.status.name == 'مكتمل':
-                tech_data[tech_id]['completed'] += 1
-            
-            if ticket.is_overdue():
-                tech_data[tech_id]['overdue'] += 1
-                
-            tech_data[tech_id]['response_times'].append(ticket.priority.response_time)
-    
     # تحويل البيانات إلى قائمة وحساب المعدلات
     technicians = []
     for tech_id, data in tech_data.items():
@@ -1714,7 +2065,7 @@ def generate_technician_performance(tickets):
             completion_rate = 0 if data['assigned'] == 0 else round((data['completed'] / data['assigned']) * 100)
             
             # حساب متوسط وقت الاستجابة
-            avg_response_time = 0 if len(data['response_times']) == 0 else round(sum(data['response_times']) / len(data['response_times']), 1)
+            avg_response_time = round(data['response_time_total'] / data['assigned'], 1)
             
             # حساب تقييم الأداء (مقياس من 1 إلى 5)
             # يعتمد على معدل الإكمال (50%)، نسبة البلاغات المتأخرة (30%)، وقت الاستجابة (20%)
@@ -1751,7 +2102,7 @@ def my_tickets():
     current_user = get_current_user()
     
     # الحصول على البلاغات التي أنشأها الموظف
-    tickets = Ticket.query.filter_by(created_by_id=current_user.id).order_by(Ticket.created_at.desc()).all()
+    tickets = ticket_listing_query('my_tickets').filter_by(created_by_id=current_user.id).order_by(Ticket.created_at.desc()).all()
     
     # تصنيف البلاغات حسب الحالة
     open_tickets = []
@@ -1760,13 +2111,14 @@ def my_tickets():
     closed_tickets = 0
     
     for ticket in tickets:
-        if ticket.status.name == 'جديد':
+        ticket_status = status_code(ticket.status_id)
+        if ticket_status == 'new':
             open_tickets.append(ticket)
-        elif ticket.status.name == 'قيد المعالجة':
+        elif ticket_status == 'in_progress':
             in_progress_tickets.append(ticket)
-        elif ticket.status.name == 'مكتمل':
+        elif ticket_status == 'completed':
             completed_tickets.append(ticket)
-        elif ticket.status.name == 'مغلق':
+        elif ticket_status == 'closed':
             closed_tickets += 1
     
     # الحصول على البلاغات المتأخرة الخاصة بهذا الموظف
@@ -1787,12 +2139,13 @@ def my_tickets():
 
 @app.route('/maintenance/reports')
 @login_required('maintenance')
+@read_replica
 def maintenance_reports():
     """صفحة تقارير فني الصيانة"""
     current_user = get_current_user()
     
     # الحصول على جميع البلاغات المسندة للفني
-    assigned_tickets = Ticket.query.filter_by(assigned_to_id=current_user.id).all()
+    assigned_tickets = ticket_listing_query('maintenance_reports').filter_by(assigned_to_id=current_user.id).all()
     
     # إجمالي البلاغات المسندة
     total_assigned = len(assigned_tickets)
@@ -1804,11 +2157,12 @@ def maintenance_reports():
     overdue_tickets = []
     
     for ticket in assigned_tickets:
-        if ticket.status.name == 'جديد':
+        ticket_status = status_code(ticket.status_id)
+        if ticket_status == 'new':
             new_tickets.append(ticket)
-        elif ticket.status.name == 'قيد المعالجة':
+        elif ticket_status == 'in_progress':
             in_progress_tickets.append(ticket)
-        elif ticket.status.name == 'مكتمل':
+        elif ticket_status == 'completed':
             completed_tickets.append(ticket)
         
         if ticket.is_overdue():
@@ -1829,8 +2183,9 @@ def maintenance_reports():
     avg_response_time = 0
     if total_assigned > 0:
         response_times = []
+        completed_status_id = registry_status_id('completed')
         for ticket in assigned_tickets:
-            if ticket.status.name == 'مكتمل':
+            if ticket.status_id == completed_status_id:
                 # حساب المدة بين إنشاء التذكرة وإكمالها بالساعات
                 duration = (ticket.updated_at - ticket.created_at).total_seconds() / 3600
                 response_times.append(duration)
@@ -1840,7 +2195,7 @@ def maintenance_reports():
     
     # إحصائيات البلاغات حسب الأولوية
     priority_stats = []
-    priorities = TicketPriority.query.all()
+    priorities = get_reference_data()['priorities']
     
     for priority in priorities:
         count = sum(1 for ticket in assigned_tickets if ticket.priority_id == priority.id)
@@ -1853,7 +2208,7 @@ def maintenance_reports():
     
     # إحصائيات البلاغات حسب القسم
     category_stats = []
-    categories = Category.query.all()
+    categories = get_reference_data()['categories']
     
     for category in categories:
         count = sum(1 for ticket in assigned_tickets if ticket.category_id == category.id)
@@ -1960,40 +2315,6 @@ def download_attachment(attachment_id):
     """تحميل المرفق"""
     return view_attachment(attachment_id)  # تحويل مباشر إلى مسار المعاينة مع إضافة معلمة download=true
 
-# Route للحصول على التصنيفات الفرعية
-@app.route('/api/subcategories/<int:category_id>')
-@login_required()
-def get_subcategories(category_id):
-    """الحصول على التصنيفات الفرعية لتصنيف معين"""
-    subcategories = SubCategory.query.filter_by(category_id=category_id).all()
-    
-    # تحويل الكائنات إلى قائمة للتمثيل JSON
-    subcategories_list = []
-    for subcategory in subcategories:
-        subcategories_list.append({
-            'id': subcategory.id,
-            'name': subcategory.name
-        })
-    
-    return jsonify({'subcategories': subcategories_list})
-
-# Route للحصول على الأقسام
-@app.route('/api/sections/<int:department_id>')
-@login_required()
-def get_sections(department_id):
-    """الحصول على الأقسام لإدارة معينة"""
-    sections = Section.query.filter_by(department_id=department_id).all()
-    
-    # تحويل الكائنات إلى قائمة للتمثيل JSON
-    sections_list = []
-    for section in sections:
-        sections_list.append({
-            'id': section.id,
-            'name': section.name
-        })
-    
-    return jsonify({'sections': sections_list})
-
 # مسار إضافة التصنيف الفرعي
 @app.route('/admin/subcategories/add', methods=['POST'])
 @login_required('admin')
@@ -2015,6 +2336,7 @@ def admin_add_subcategory():
     subcategory = SubCategory(name=name, category_id=category_id)
     db.session.add(subcategory)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم إضافة التصنيف الفرعي بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -2038,6 +2360,7 @@ def admin_edit_subcategory():
     # تحديث اسم التصنيف الفرعي
     subcategory.name = name
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم تحديث التصنيف الفرعي بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -2059,6 +2382,7 @@ def admin_delete_subcategory():
     # حذف التصنيف الفرعي
     db.session.delete(subcategory)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم حذف التصنيف الفرعي بنجاح', 'success')
     return redirect(url_for('admin_categories'))
@@ -2105,6 +2429,7 @@ def admin_add_department():
     department = Department(name=name)
     db.session.add(department)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم إضافة الإدارة بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2128,6 +2453,7 @@ def admin_edit_department():
     # تحديث اسم الإدارة
     department.name = name
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم تحديث الإدارة بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2144,6 +2470,7 @@ def admin_delete_department():
     # حذف الإدارة (سيتم حذف جميع الأقسام والبلاغات المرتبطة بها تلقائيًا بسبب cascade)
     db.session.delete(department)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم حذف الإدارة بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2169,6 +2496,7 @@ def admin_add_section():
     section = Section(name=name, department_id=department_id)
     db.session.add(section)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم إضافة القسم بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2192,6 +2520,7 @@ def admin_edit_section():
     # تحديث اسم القسم
     section.name = name
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم تحديث القسم بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2214,6 +2543,7 @@ def admin_delete_section():
     # حذف القسم
     db.session.delete(section)
     db.session.commit()
+    bump_reference_data_version()
     
     flash('تم حذف القسم بنجاح', 'success')
     return redirect(url_for('admin_departments'))
@@ -2425,6 +2755,9 @@ def search_beneficiaries():
 def export_beneficiaries():
     """تصدير قائمة المستفيدين كملف XLSX"""
     # إنشاء ملف إكسل جديد
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
+
     wb = Workbook()
     ws = wb.active
     ws.title = "المستفيدون"
@@ -2480,6 +2813,7 @@ def import_beneficiaries():
     
     try:
         # قراءة الملف
+        import openpyxl
         wb = openpyxl.load_workbook(file)
         ws = wb.active
         
@@ -2514,5 +2848,8 @@ def import_beneficiaries():
 
 
 # تشغيل التطبيق
+create_app()
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
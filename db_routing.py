@@ -0,0 +1,139 @@
+"""
+db_routing.py - توجيه قراءات صفحات التقارير ولوحات التحكم إلى نسخة القراءة (replica)
+
+عند تحديد DATABASE_REPLICA_URL تُضاف قاعدة بيانات ثانية باسم replica إلى SQLALCHEMY_BINDS.
+في المسارات المعلمة بـ read_replica تذهب استعلامات SELECT إلى النسخة، وأي كتابة تذهب إلى
+القاعدة الرئيسية وتبقى بعدها قراءات نفس المعاملة على الرئيسية حتى ترى ما كُتب. إذا تعذر
+الاتصال بالنسخة تُستخدم الرئيسية ولا تُجرب النسخة مرة أخرى قبل DATABASE_REPLICA_RETRY_INTERVAL.
+المسارات غير المعلمة (إنشاء البلاغات والتعليقات وتغيير الحالة ونموذج الصيانة) تبقى على الرئيسية.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+
+# النسخة لا تُستخدم قبل هذا الوقت (time.monotonic) بعد آخر فشل، مشترك بين خيوط العملية
+_replica_lock = threading.Lock()
+_replica_retry_at = 0.0
+
+
+def replica_configured():
+    """هل توجد نسخة قراءة في إعدادات التطبيق"""
+    return REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+
+
+def replica_available():
+    """هل يمكن تجربة النسخة الآن (لم تفشل خلال فترة إعادة المحاولة)"""
+    with _replica_lock:
+        return time.monotonic() >= _replica_retry_at
+
+
+def mark_replica_failed(error):
+    """إيقاف استخدام النسخة في هذه العملية حتى انتهاء فترة إعادة المحاولة"""
+    global _replica_retry_at
+    interval = current_app.config.get('DATABASE_REPLICA_RETRY_INTERVAL', 30)
+    with _replica_lock:
+        _replica_retry_at = time.monotonic() + interval
+    current_app.logger.error(f"تعذر استخدام نسخة القراءة، تُستخدم القاعدة الرئيسية: {str(error)}")
+
+
+class RoutingSession(Session):
+    """جلسة db.session التي ترسل استعلامات SELECT إلى النسخة داخل replica_reads فقط"""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote_in_transaction = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and g.get('use_replica'):
+            if self._flushing or isinstance(clause, UpdateBase):
+                self._wrote_in_transaction = True
+            elif isinstance(clause, Select) and not self._wrote_in_transaction:
+                replica = self._replica_engine()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self):
+        engine = self._db.engines.get(REPLICA_BIND)
+        if engine is None or not replica_available():
+            return None
+        try:
+            # فتح اتصال النسخة ضمن المعاملة الحالية (يُعاد استخدامه لبقية الاستعلامات)
+            self.connection(bind_arguments={'bind': engine})
+        except DBAPIError as e:
+            mark_replica_failed(e)
+            return None
+        g.replica_used = True
+        return engine
+
+    def commit(self):
+        super().commit()
+        self._wrote_in_transaction = False
+
+    def rollback(self):
+        super().rollback()
+        self._wrote_in_transaction = False
+
+    def close(self):
+        super().close()
+        self._wrote_in_transaction = False
+
+
+@contextmanager
+def replica_reads():
+    """إرسال قراءات db.session داخل هذه الكتلة إلى النسخة إن وُجدت (مثل مهام التقارير في الخلفية)"""
+    previous = g.get('use_replica', False)
+    g.use_replica = True
+    try:
+        yield
+    finally:
+        g.use_replica = previous
+
+
+@contextmanager
+def primary_reads():
+    """
+    قراءات db.session داخل هذه الكتلة من القاعدة الرئيسية حتى داخل مسار read_replica
+
+    لصفوف تكتبها عمليات أخرى ويجب أن تُقرأ بأحدث حالة (مثل مهام التقارير المنتهية)، لأن النسخة
+    قد تكون متأخرة عن الرئيسية.
+    """
+    previous = g.get('use_replica', False)
+    g.use_replica = False
+    try:
+        yield
+    finally:
+        g.use_replica = previous
+
+
+def read_replica(view):
+    """
+    مزخرف للمسارات التحليلية التي تقرأ فقط: قراءاتها من النسخة
+
+    إذا فشلت النسخة أثناء الطلب يُعاد تنفيذ المسار مرة واحدة على القاعدة الرئيسية.
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        if not replica_configured():
+            return view(*args, **kwargs)
+
+        g.replica_used = False
+        try:
+            with replica_reads():
+                return view(*args, **kwargs)
+        except DBAPIError as e:
+            if not g.get('replica_used'):
+                raise
+            current_app.extensions['sqlalchemy'].session.rollback()
+            mark_replica_failed(e)
+            return view(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,141 @@
+"""
+form_export.py - تصدير نماذج الصيانة لعدة بلاغات (ملف PDF متعدد الصفحات أو ملف ZIP)
+
+البلاغات تُقرأ على دفعات بترتيب المعرف، ولكل دفعة تُجلب آخر تعليقات الفنيين ومرفقات نماذج
+الصيانة ومهام الإنشاء المنتهية باستعلام واحد لكل منها. ملف ZIP يُرسل أثناء إنشائه ملفاً بعد
+ملف، فلا يبقى في الذاكرة إلا نموذج واحد مهما كان عدد البلاغات.
+"""
+
+import json
+import os
+import zipfile
+from models import db, Ticket, Comment, Attachment, FormRenderJob
+from ticket_registry import status_code
+
+# أسماء مرفقات نماذج الصيانة التي أُنشئت قبل تمييزها بـ attachment_type='form'
+FORM_ATTACHMENT_NAME = 'نموذج صيانة - بلاغ %'
+
+
+def export_ticket_batches(query, batch_size):
+    """البلاغات المطابقة للاستعلام على دفعات بترتيب المعرف (بالمؤشر على المعرف وليس OFFSET)"""
+    last_id = 0
+    while True:
+        batch = query.filter(Ticket.id > last_id).order_by(Ticket.id.asc()).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def _latest_by_ticket(rows):
+    """أول صف لكل بلاغ من نتائج مرتبة حسب البلاغ ثم من الأحدث للأقدم"""
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.ticket_id, row)
+    return latest
+
+
+def maintenance_form_exports(tickets):
+    """
+    بيانات نموذج الصيانة لكل بلاغ في الدفعة
+
+    يُعاد استخدام ملف النموذج المرفق بالبلاغ إذا كان ما زال حالياً: أُنشئ بعد آخر تعديل على البلاغ
+    وبعد آخر تعليق للفني المسؤول، وما زال الملف موجوداً. غير ذلك يُرسم النموذج من جديد بقيم آخر
+    حفظ للنموذج (إن وُجدت مهمته) أو بقيم البلاغ الحالية بدون توقيع.
+
+    Returns:
+        list: لكل بلاغ {'ticket', 'file_path' (None إذا يجب رسمه), 'params' (وسائط الرسم)}
+    """
+    ticket_ids = [ticket.id for ticket in tickets]
+
+    comments = _latest_by_ticket(
+        db.session.query(Comment.ticket_id, Comment.content, Comment.created_at)
+        .join(Ticket, Ticket.id == Comment.ticket_id)
+        .filter(Comment.ticket_id.in_(ticket_ids), Comment.user_id == Ticket.assigned_to_id)
+        .order_by(Comment.ticket_id, Comment.created_at.desc())
+    )
+    attachments = _latest_by_ticket(
+        db.session.query(Attachment.ticket_id, Attachment.file_path, Attachment.upload_date)
+        .filter(
+            Attachment.ticket_id.in_(ticket_ids),
+            Attachment.file_type == 'application/pdf',
+            db.or_(Attachment.attachment_type == 'form', Attachment.filename.like(FORM_ATTACHMENT_NAME))
+        )
+        .order_by(Attachment.ticket_id, Attachment.upload_date.desc())
+    )
+    jobs = _latest_by_ticket(
+        db.session.query(FormRenderJob.ticket_id, FormRenderJob.params)
+        .filter(FormRenderJob.ticket_id.in_(ticket_ids), FormRenderJob.status == 'done')
+        .order_by(FormRenderJob.ticket_id, FormRenderJob.finished_at.desc())
+    )
+
+    exports = []
+    for ticket in tickets:
+        comment = comments.get(ticket.id)
+        attachment = attachments.get(ticket.id)
+        job = jobs.get(ticket.id)
+
+        changed_at = [value for value in (ticket.updated_at, comment.created_at if comment else None) if value]
+        file_path = None
+        if (attachment and attachment.upload_date
+                and all(attachment.upload_date >= value for value in changed_at)
+                and os.path.exists(attachment.file_path)):
+            file_path = attachment.file_path
+
+        if job:
+            params = json.loads(job.params)
+        else:
+            problem_solved = ticket.problem_solved
+            if problem_solved is None:
+                problem_solved = status_code(ticket.status_id) == 'completed'
+            params = {
+                'problem_solved': problem_solved,
+                'problem_reasons': ticket.problem_reasons or '',
+                'signature_data': ''
+            }
+        params['technician_comment'] = comment.content if comment else None
+
+        exports.append({'ticket': ticket, 'file_path': file_path, 'params': params})
+    return exports
+
+
+class _ZipOutput:
+    """ملف للكتابة فقط يجمع ما يكتبه zipfile حتى يُرسل (بدون tell يكتب zipfile دون الرجوع للخلف)"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries):
+    """
+    إنشاء ملف ZIP وإرساله على أجزاء أثناء إنشائه
+
+    Args:
+        entries: (اسم الملف في ZIP، مسار ملف موجود أو محتواه bytes) لكل ملف
+
+    ملفات PDF مضغوطة أصلاً فتُخزن بدون ضغط.
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for name, content in entries:
+            if isinstance(content, bytes):
+                archive.writestr(name, content)
+            else:
+                archive.write(content, name)
+            yield output.take()
+    yield output.take()
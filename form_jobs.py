@@ -0,0 +1,215 @@
+"""
+form_jobs.py - إنشاء ملف PDF لنموذج الصيانة في الخلفية وإرفاقه بالبلاغ عند انتهائه
+
+حفظ النموذج يحفظ التعليق وحالة البلاغ فوراً، ويُنشأ الملف في مجموعة خيوط داخل العملية التي
+استقبلت الطلب. حالة المهمة في جدول form_render_jobs حتى تعرض صفحة البلاغ "جاري الإنشاء" من أي
+عملية للخادم. المحاولة الفاشلة تُعاد تلقائياً حتى FORM_RENDER_MAX_ATTEMPTS، وبعدها (أو إذا
+توقفت العملية قبل انتهاء المهمة) يمكن إعادتها من صفحة البلاغ.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import inspect
+from models import db, FormRenderJob, Attachment, Ticket, User
+
+PENDING_STATUSES = ('queued', 'running')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers):
+    """إنشاء مجموعة الخيوط عند أول استخدام (وليس عند الاستيراد) لتعمل بعد fork في gunicorn"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='form-render')
+        return _executor
+
+
+def ensure_form_render_jobs_table():
+    """إنشاء جدول مهام نماذج الصيانة في قاعدة بيانات قائمة إذا لم يكن موجوداً"""
+    # قبل setup_api لا توجد الجداول التي يشير إليها الجدول (و PostgreSQL تتحقق من ذلك)
+    inspector = inspect(db.engine)
+    for table in (Ticket.__tablename__, User.__tablename__, Attachment.__tablename__):
+        if not inspector.has_table(table):
+            return False
+    FormRenderJob.__table__.create(db.engine, checkfirst=True)
+    return True
+
+
+def _update_job(job_id, **values):
+    FormRenderJob.query.filter_by(id=job_id).update(values)
+    db.session.commit()
+
+
+def _render_attempt(job_id, ticket_id, user_id, params, render):
+    """
+    محاولة واحدة: إنشاء الملف ثم إرفاقه بالبلاغ وإنهاء المهمة في نفس المعاملة
+
+    اسم الملف من بصمة مدخلات النموذج، فإذا كان مرفقاً بالبلاغ (إعادة حفظ بنفس البيانات) يُستخدم
+    نفس المرفق. نماذج البلاغ السابقة تُحذف مع ملفاتها لأن الملف الجديد يحل محلها.
+    """
+    file_path = None
+    created = False
+    try:
+        file_path = render(ticket_id, **params)
+        attachment = Attachment.query.filter_by(ticket_id=ticket_id, file_path=file_path).first()
+        if attachment is None:
+            created = True
+            attachment = Attachment(
+                filename=f"نموذج صيانة - بلاغ {ticket_id}.pdf",
+                file_path=file_path,
+                file_type='application/pdf',
+                ticket_id=ticket_id,
+                user_id=user_id,
+                attachment_type='form'
+            )
+            db.session.add(attachment)
+            db.session.flush()
+        else:
+            # الملف مطابق لبيانات البلاغ الحالية، فيُعتبر حديثاً (يستخدمه تصدير النماذج)
+            attachment.upload_date = datetime.utcnow()
+
+        superseded = Attachment.query.filter(
+            Attachment.ticket_id == ticket_id,
+            Attachment.attachment_type == 'form',
+            Attachment.id != attachment.id
+        ).all()
+        superseded_paths = [old.file_path for old in superseded if old.file_path != file_path]
+        if superseded:
+            # SQLite لا تطبق ON DELETE SET NULL بدون تفعيل المفاتيح الأجنبية
+            FormRenderJob.query.filter(
+                FormRenderJob.attachment_id.in_([old.id for old in superseded])
+            ).update({'attachment_id': None}, synchronize_session=False)
+            for old in superseded:
+                db.session.delete(old)
+
+        FormRenderJob.query.filter_by(id=job_id).update({
+            'status': 'done', 'attachment_id': attachment.id, 'error': None, 'finished_at': datetime.utcnow()
+        })
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # لا يبقى ملف بدون مرفق إذا فشل الحفظ بعد إنشائه (الملف المرفق مسبقاً يبقى)
+        if created and file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    for path in superseded_paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            current_app.logger.error(f"خطأ في حذف ملف نموذج الصيانة السابق {path}: {str(e)}")
+
+
+def _run_form_job(app, job_id, render):
+    """تنفيذ المهمة داخل سياق التطبيق مع إعادة المحاولة بعد الفشل"""
+    with app.app_context():
+        try:
+            job = db.session.get(FormRenderJob, job_id)
+            if job is None:
+                return
+            params = json.loads(job.params)
+            ticket_id, user_id, attempt = job.ticket_id, job.created_by_id, job.attempts
+            max_attempts = app.config['FORM_RENDER_MAX_ATTEMPTS']
+
+            while True:
+                attempt += 1
+                _update_job(job_id, status='running', attempts=attempt)
+                try:
+                    _render_attempt(job_id, ticket_id, user_id, params, render)
+                    return
+                except Exception as e:
+                    app.logger.error(f"خطأ في إنشاء ملف نموذج الصيانة للبلاغ {ticket_id} (المحاولة {attempt}): {str(e)}")
+                    if attempt >= max_attempts:
+                        _update_job(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+                        return
+                    _update_job(job_id, status='queued', error=str(e))
+                    time.sleep(app.config['FORM_RENDER_RETRY_DELAY'] * attempt)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"خطأ في تحديث حالة مهمة نموذج الصيانة: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def _start_job(job_id, render):
+    app = current_app._get_current_object()
+    _get_executor(app.config['FORM_RENDER_WORKERS']).submit(_run_form_job, app, job_id, render)
+
+
+def submit_form_render_job(ticket_id, params, render, user_id=None):
+    """
+    إضافة مهمة إنشاء ملف نموذج الصيانة
+
+    تُحفظ المهمة مع التغييرات المعلقة في الجلسة (التعليق وحالة البلاغ) في نفس المعاملة،
+    ثم يبدأ الإنشاء في الخلفية بعد الحفظ.
+
+    Args:
+        ticket_id: معرف البلاغ
+        params: وسائط دالة الإنشاء عدا ticket_id (قابلة للتحويل إلى JSON)
+        render: دالة render(ticket_id, **params) تعيد مسار ملف PDF
+        user_id: معرف المستخدم الذي حفظ النموذج (صاحب المرفق)
+
+    Returns:
+        FormRenderJob: المهمة الجديدة
+    """
+    # حذف المهام المنتهية القديمة (الفاشلة تبقى حتى إعادة محاولتها)
+    FormRenderJob.query.filter(
+        FormRenderJob.status == 'done',
+        FormRenderJob.created_at < datetime.utcnow() - timedelta(seconds=current_app.config['FORM_RENDER_RETENTION'])
+    ).delete(synchronize_session=False)
+
+    job = FormRenderJob(
+        id=uuid.uuid4().hex, ticket_id=ticket_id, params=json.dumps(params),
+        status='queued', attempts=0, created_by_id=user_id
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _start_job(job.id, render)
+    return job
+
+
+def retry_form_render_job(job, render):
+    """إعادة مهمة فاشلة أو متوقفة إلى قائمة الانتظار بعدد محاولات جديد"""
+    _update_job(job.id, status='queued', attempts=0, error=None, finished_at=None, created_at=datetime.utcnow())
+    _start_job(job.id, render)
+
+
+def form_job_status(job):
+    """حالة المهمة بصيغة قابلة للتحويل إلى JSON (المهمة المعلقة بعد انتهاء المهلة تعتبر فاشلة)"""
+    status = job.status
+    error = job.error
+    timeout = timedelta(seconds=current_app.config['FORM_RENDER_TIMEOUT'])
+    if status in PENDING_STATUSES and job.created_at and job.created_at < datetime.utcnow() - timeout:
+        status = 'failed'
+        error = 'انتهت مهلة إنشاء ملف نموذج الصيانة'
+
+    return {
+        'job_id': job.id,
+        'ticket_id': job.ticket_id,
+        'status': status,
+        'attempts': job.attempts,
+        'error': error,
+        'attachment_id': job.attachment_id,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def ticket_form_jobs(ticket_id):
+    """مهام البلاغ التي لم تنته بنجاح بعد (قيد الإنشاء أو فاشلة) لعرضها في صفحة البلاغ"""
+    jobs = FormRenderJob.query.filter(
+        FormRenderJob.ticket_id == ticket_id,
+        FormRenderJob.status != 'done'
+    ).order_by(FormRenderJob.created_at.desc()).all()
+    return [form_job_status(job) for job in jobs]
@@ -0,0 +1,193 @@
+"""
+maintenance_pdf.py - قوالب ملفات PDF لنماذج الصيانة (تُبنى مرة واحدة لكل عملية)
+
+كل حفظ لنموذج الصيانة كان ينشئ FPDF جديداً ويحمّل خطي Arial ويقرأ الشعار ويشكّل نصوص
+الترويسة الثابتة من جديد. هنا يُبنى لكل تصميم مستند قالب فيه الخطوط والصفحة الأولى والترويسة
+والشعار وعنوان النموذج، وكل نموذج يبدأ من نسخة منه ويرسم حقول البلاغ المتغيرة فقط.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+FONT_FILES = (('', 'static/fonts/arial.ttf'), ('B', 'static/fonts/arialbd.ttf'))
+LOGO_PATH = os.path.join(basedir, 'static/images/moi_logo.png')
+
+# أقصى عدد من النصوص المشكّلة المحفوظة في كل عملية (التسميات الثابتة وأسماء المستفيدين والأقسام)
+ARABIC_TEXT_CACHE_SIZE = 2048
+
+# يُزاد عند تغيير رسم النماذج حتى لا تُستخدم الملفات المنشأة بالرسم السابق
+FORM_LAYOUT_VERSION = 1
+
+# قوالب التصاميم في هذه العملية (اسم التصميم -> FPDF)، لا تُعدل بعد بنائها
+_templates = {}
+_templates_lock = threading.Lock()
+_reshaper = None
+
+
+def _get_reshaper():
+    """
+    كائن تشكيل واحد للعملية يحفظ تعبير الحروف المركبة (ligatures) بعد أول استخدام
+
+    arabic_reshaper 3.0 يعيد بناء هذا التعبير من ملف الإعدادات في كل استدعاء لـ reshape
+    (نحو 5 ملي ثانية لكل نص) لأن شرط التحقق من وجوده لا يطابق اسم الخاصية بعد تحويلها.
+    الإصلاح يعتمد على أن _ligatures_re خاصية (property) كما في الإصدار المثبت في requirements.txt،
+    وإذا تغير ذلك في إصدار آخر يُستخدم ArabicReshaper كما هو.
+    """
+    global _reshaper
+    if _reshaper is None:
+        from functools import cached_property
+        from arabic_reshaper import ArabicReshaper
+
+        ligatures_property = ArabicReshaper.__dict__.get('_ligatures_re')
+        if isinstance(ligatures_property, property):
+            class _CachedReshaper(ArabicReshaper):
+                @cached_property
+                def _ligatures_re(self):
+                    return ligatures_property.fget(self)
+
+            _reshaper = _CachedReshaper()
+        else:
+            _reshaper = ArabicReshaper()
+    return _reshaper
+
+
+@lru_cache(maxsize=ARABIC_TEXT_CACHE_SIZE)
+def shape_arabic(text):
+    """تشكيل النص العربي وترتيبه من اليمين لليسار (النتيجة محفوظة لنفس النص)"""
+    from bidi.algorithm import get_display
+    return get_display(_get_reshaper().reshape(text))
+
+
+def arabic_text(text, rtl=True):
+    """تشكيل النص العربي وترتيبه للكتابة في FPDF"""
+    if not text:
+        return ""
+    if rtl:
+        return shape_arabic(str(text))
+    return str(text)
+
+
+def _draw_form_header(pdf):
+    """ترويسة نموذج الصيانة الموقّع: الجهة يميناً والشعار في الوسط والعنوان أسفله"""
+    # تحديد الهوامش للتأكد من أن كل شيء يظهر في صفحة واحدة
+    pdf.set_margins(10, 10, 10)
+
+    # اسم الجهة في الجهة اليمنى
+    pdf.set_font('Arial', 'B', 10)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_xy(140, 10)
+    pdf.cell(60, 6, arabic_text('المملكة العربية السعودية'), 0, 1, 'R')
+    pdf.set_xy(140, 15)
+    pdf.cell(60, 5, arabic_text('وزارة الداخلية'), 0, 1, 'R')
+    pdf.set_font('Arial', '', 8)
+    pdf.set_xy(140, 20)
+    pdf.cell(60, 4, arabic_text('المديرية العامة للسجون'), 0, 1, 'R')
+    pdf.set_xy(140, 24)
+    pdf.cell(60, 4, arabic_text('مديرية السجون بمنطقة جازان'), 0, 1, 'R')
+    pdf.set_xy(140, 28)
+    pdf.cell(60, 4, arabic_text('إدارة التقنية والذكاء الإصطناعي'), 0, 1, 'R')
+    pdf.set_xy(140, 32)
+    pdf.cell(60, 4, arabic_text('شعبة الدعم الفني'), 0, 1, 'R')
+
+    # إضافة الشعار في وسط الترويسة
+    if os.path.exists(LOGO_PATH):
+        pdf.image(LOGO_PATH, x=95, y=15, w=20)
+
+    # عنوان النموذج أسفل الشعار
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(24, 116, 205)
+    pdf.set_xy(60, 37)
+    pdf.cell(90, 10, arabic_text('نموذج طلب صيانة الدعم الفني'), 0, 0, 'C')
+
+
+def _draw_classic_header(pdf):
+    """ترويسة نموذج الصيانة بالتصميم القديم"""
+    header_color = (0, 73, 144)  # أزرق غامق
+
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(header_color[0], header_color[1], header_color[2])
+    pdf.set_xy(110, 10)
+    pdf.cell(90, 6, arabic_text('المملكة العربية السعودية'), 0, 1, 'R')
+    pdf.set_xy(110, 16)
+    pdf.cell(90, 6, arabic_text('وزارة الداخلية'), 0, 1, 'R')
+    pdf.set_xy(110, 22)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(90, 6, arabic_text('المديرية العامة للسجون'), 0, 1, 'R')
+    pdf.set_xy(110, 28)
+    pdf.cell(90, 6, arabic_text('مديرية السجون بمنطقة جازان'), 0, 1, 'R')
+
+    # الشعار
+    if os.path.exists(LOGO_PATH):
+        pdf.image(LOGO_PATH, x=85, y=10, w=30)
+
+    # عنوان النموذج
+    pdf.set_y(45)
+    pdf.set_font('Arial', 'B', 18)
+    pdf.cell(0, 10, arabic_text('نموذج طلب صيانة الدعم الفني'), 0, 1, 'C')
+
+
+FORM_HEADERS = {
+    'form': _draw_form_header,
+    'classic': _draw_classic_header,
+}
+
+
+def _build_template(layout):
+    # مكتبة PDF تُستورد عند أول استخدام لتقليل زمن بدء التشغيل والذاكرة لكل عملية
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation='P', unit='mm', format='A4')
+    pdf.add_page()
+    for style, path in FONT_FILES:
+        pdf.add_font('Arial', style, os.path.join(basedir, path), uni=True)
+    FORM_HEADERS[layout](pdf)
+    return pdf
+
+
+def new_form_pdf(layout):
+    """
+    مستند PDF جديد لنموذج صيانة من قالب التصميم (صفحة واحدة مرسوم فيها الترويسة الثابتة)
+
+    Args:
+        layout: اسم التصميم في FORM_HEADERS ('form' للنموذج الموقّع أو 'classic')
+
+    النسخة مستقلة عن القالب ما عدا جداول عرض الحروف في الخطوط فهي كبيرة وللقراءة فقط.
+    """
+    with _templates_lock:
+        template = _templates.get(layout)
+        if template is None:
+            template = _templates[layout] = _build_template(layout)
+
+    shared = {id(font['cw']): font['cw'] for font in template.fonts.values()}
+    return copy.deepcopy(template, shared)
+
+
+def add_form_page(pdf, layout):
+    """إضافة صفحة جديدة مرسوم فيها ترويسة التصميم لنموذج آخر في نفس المستند (مثل التصدير المجمع)"""
+    pdf.add_page()
+    FORM_HEADERS[layout](pdf)
+
+
+def pdf_bytes(pdf):
+    """محتوى المستند كـ bytes (pyfpdf تعيده نصاً بترميز latin-1 في بايثون 3)"""
+    data = pdf.output(dest='S')
+    if isinstance(data, str):
+        return data.encode('latin-1')
+    return data
+
+
+def form_digest(layout, values):
+    """
+    بصمة مدخلات النموذج (SHA-256) لتسمية ملفه، فنفس المدخلات تعطي نفس الملف
+
+    Args:
+        layout: اسم التصميم في FORM_HEADERS
+        values: كل القيم المرسومة في النموذج (قابلة للتحويل إلى JSON، والتواريخ كنصوص)
+    """
+    payload = json.dumps([layout, FORM_LAYOUT_VERSION, values], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
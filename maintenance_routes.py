@@ -2,19 +2,21 @@
 maintenance_routes.py - مسارات Flask لنموذج الصيانة الإلكتروني
 """
 
-from flask import render_template, request, redirect, url_for, flash, session, jsonify, make_response
-from models import db, Ticket, User, Attachment, Comment, TicketStatus
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, make_response, Response, stream_with_context
+from models import db, Ticket, User, Attachment, Comment, FormRenderJob
 from datetime import datetime
 import base64
 import io
 import os
 import uuid
 from werkzeug.utils import secure_filename
-from PIL import Image
 from functools import wraps
-import arabic_reshaper
-from bidi.algorithm import get_display
-from fpdf import FPDF
+from user_context import load_current_identity, get_current_user
+from ticket_registry import status_id, priority_code
+from maintenance_pdf import arabic_text, new_form_pdf, add_form_page, pdf_bytes, form_digest
+from form_jobs import submit_form_render_job, retry_form_render_job, form_job_status
+from form_export import export_ticket_batches, maintenance_form_exports, stream_zip
+from ticket_queries import ticket_listing_query, dashboard_filters, dashboard_tickets_query
 
 def login_required(user_type=None):
     """التحقق من تسجيل الدخول والصلاحيات"""
@@ -25,7 +27,7 @@ def login_required(user_type=None):
                 flash('يرجى تسجيل الدخول أولاً', 'error')
                 return redirect(url_for('login'))
             
-            user = User.query.get(session['user_id'])
+            user = load_current_identity()
             if not user:
                 session.pop('user_id', None)
                 flash('يرجى تسجيل الدخول مرة أخرى', 'error')
@@ -39,12 +41,6 @@ def login_required(user_type=None):
         return wrapped
     return decorator
 
-def get_current_user():
-    """الحصول على المستخدم الحالي"""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
-
 def add_maintenance_routes(app):
     """
     إضافة مسارات نموذج الصيانة الإلكتروني إلى تطبيق Flask
@@ -116,24 +112,15 @@ def add_maintenance_routes(app):
             if latest_comment:
                 technician_comment = latest_comment.content
         
-        # إنشاء ملف PDF يتضمن التوقيع
-        pdf_file_path = create_maintenance_form_pdf_with_signature(
-            ticket_id, 
-            problem_solved, 
-            problem_reasons,
-            technician_comment,
-            signature_data
-        )
-        
         # إضافة تعليق بشأن إكمال النموذج
         comment_content = "تم تعبئة نموذج الصيانة الإلكتروني. "
         if problem_solved:
             comment_content += "تم حل المشكلة بنجاح."
             
             # تحديث حالة البلاغ إلى "مكتمل" إذا تم حل المشكلة
-            completed_status = TicketStatus.query.filter_by(name='مكتمل').first()
-            if completed_status:
-                ticket.status_id = completed_status.id
+            completed_status_id = status_id('completed')
+            if completed_status_id:
+                ticket.status_id = completed_status_id
         else:
             comment_content += f"لم يتم حل المشكلة."
             if problem_reasons:
@@ -148,45 +135,174 @@ def add_maintenance_routes(app):
         
         db.session.add(comment)
         
-        # حفظ ملف PDF كمرفق للبلاغ
-        if pdf_file_path:
-            attachment = Attachment(
-                filename=f"نموذج صيانة - بلاغ {ticket.id}.pdf",
-                file_path=pdf_file_path,
-                file_type='application/pdf',
-                ticket_id=ticket_id,
-                user_id=current_user.id
-            )
-            db.session.add(attachment)
+        # حفظ التغييرات مع مهمة إنشاء ملف PDF (يتضمن التوقيع) في الخلفية، ويُرفق بالبلاغ عند انتهائه
+        submit_form_render_job(
+            ticket_id,
+            {
+                'problem_solved': problem_solved,
+                'problem_reasons': problem_reasons,
+                'technician_comment': technician_comment,
+                'signature_data': signature_data
+            },
+            create_maintenance_form_pdf_with_signature,
+            user_id=current_user.id
+        )
         
-        # حفظ التغييرات
-        db.session.commit()
+        flash('تم حفظ نموذج الصيانة بنجاح، وجاري إنشاء ملف PDF وإرفاقه بالبلاغ', 'success')
+        return redirect(url_for('view_ticket', ticket_id=ticket_id))
+    
+    @app.route('/ticket/<int:ticket_id>/maintenance_form/jobs/<job_id>')
+    @login_required()
+    def maintenance_form_job_status(ticket_id, job_id):
+        """حالة إنشاء ملف نموذج الصيانة (تستخدمها صفحة البلاغ للمتابعة)"""
+        job = FormRenderJob.query.filter_by(id=job_id, ticket_id=ticket_id).first()
+        if not job:
+            return jsonify({'status': 'error', 'message': 'المهمة غير موجودة'}), 404
+        return jsonify(form_job_status(job))
+    
+    @app.route('/ticket/<int:ticket_id>/maintenance_form/jobs/<job_id>/retry', methods=['POST'])
+    @login_required()
+    def retry_maintenance_form_job(ticket_id, job_id):
+        """إعادة إنشاء ملف نموذج الصيانة بعد فشل جميع المحاولات أو توقفها"""
+        ticket = Ticket.query.get_or_404(ticket_id)
+        current_user = get_current_user()
         
-        flash('تم حفظ نموذج الصيانة بنجاح وإرفاقه بالبلاغ', 'success')
+        if (current_user.user_type != 'admin' and 
+            current_user.id != ticket.assigned_to_id and 
+            current_user.id != ticket.created_by_id):
+            flash('ليس لديك صلاحية لإعادة إنشاء هذا النموذج', 'error')
+            return redirect(url_for('view_ticket', ticket_id=ticket_id))
+        
+        job = FormRenderJob.query.filter_by(id=job_id, ticket_id=ticket_id).first_or_404()
+        if form_job_status(job)['status'] != 'failed':
+            flash('ملف نموذج الصيانة قيد الإنشاء أو تم إنشاؤه', 'info')
+        else:
+            retry_form_render_job(job, create_maintenance_form_pdf_with_signature)
+            flash('جاري إعادة إنشاء ملف نموذج الصيانة', 'success')
         return redirect(url_for('view_ticket', ticket_id=ticket_id))
     
+    @app.route('/admin/maintenance_forms/export')
+    @login_required('admin')
+    def export_maintenance_forms():
+        """
+        تصدير نماذج الصيانة للبلاغات المطابقة لتصفية لوحة تحكم الإدارة
+        
+        format=zip (الافتراضي): ملف ZIP فيه ملف PDF لكل بلاغ، يُرسل أثناء إنشائه ويُعاد فيه استخدام
+        ملف النموذج المرفق بالبلاغ إذا كان حالياً. format=pdf: ملف PDF واحد بصفحة لكل بلاغ.
+        """
+        export_format = request.args.get('format', 'zip')
+        filters = dashboard_filters(request.args)
+        tickets_query = dashboard_tickets_query(filters)
+        
+        # التحقق من عدد البلاغات قبل البدء (ملف PDF الواحد يُبنى في الذاكرة)
+        tickets_count = tickets_query.count()
+        max_tickets = app.config['MAINTENANCE_EXPORT_MAX_TICKETS']
+        if not tickets_count:
+            flash('لا توجد بلاغات مطابقة للتصفية لتصدير نماذج الصيانة', 'info')
+            return redirect(url_for('admin_dashboard', **filters))
+        if tickets_count > max_tickets:
+            flash(f'عدد البلاغات المطابقة ({tickets_count}) أكبر من الحد الأقصى للتصدير ({max_tickets})، يرجى تضييق التصفية', 'error')
+            return redirect(url_for('admin_dashboard', **filters))
+        
+        batches = export_ticket_batches(
+            ticket_listing_query('maintenance_forms', tickets_query),
+            app.config['MAINTENANCE_EXPORT_BATCH_SIZE']
+        )
+        export_date = datetime.now().strftime('%Y%m%d')
+        
+        if export_format == 'pdf':
+            pdf = None
+            for batch in batches:
+                for export in maintenance_form_exports(batch):
+                    if pdf is None:
+                        pdf = new_form_pdf('form')
+                    else:
+                        add_form_page(pdf, 'form')
+                    draw_maintenance_form(pdf, export['ticket'], **export['params'])
+            
+            response = make_response(pdf_bytes(pdf))
+            response.headers['Content-Disposition'] = f'attachment; filename=maintenance_forms_{export_date}.pdf'
+            response.headers['Content-Type'] = 'application/pdf'
+            return response
+        
+        def zip_entries():
+            for batch in batches:
+                for export in maintenance_form_exports(batch):
+                    ticket = export['ticket']
+                    name = f"maintenance_form_{ticket.id}.pdf"
+                    if export['file_path']:
+                        yield name, export['file_path']
+                        continue
+                    try:
+                        pdf = new_form_pdf('form')
+                        draw_maintenance_form(pdf, ticket, **export['params'])
+                        yield name, pdf_bytes(pdf)
+                    except Exception as e:
+                        app.logger.error(f"خطأ في إنشاء نموذج الصيانة للبلاغ {ticket.id} أثناء التصدير: {str(e)}")
+        
+        response = Response(stream_with_context(stream_zip(zip_entries())), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename=maintenance_forms_{export_date}.zip'
+        return response
+    
 
     def create_maintenance_form_pdf_with_signature(ticket_id, problem_solved, problem_reasons, technician_comment, signature_data):
         """إنشاء ملف PDF لنموذج الصيانة بتصميم متطابق مع صفحة الويب في صفحة واحدة فقط"""
         ticket = Ticket.query.get_or_404(ticket_id)
         
-        # إنشاء ملف PDF جديد
-        pdf = FPDF(orientation='P', unit='mm', format='A4')
-        pdf.add_page()
+        basedir = os.path.abspath(os.path.dirname(__file__))
+        pdf_folder = os.path.join(basedir, 'uploads')
+        
+        # اسم الملف من بصمة المدخلات: إعادة الحفظ بنفس البيانات تعيد نفس الملف بدون إنشائه من جديد
+        digest = form_digest('form', maintenance_form_inputs(
+            ticket, problem_solved, problem_reasons, technician_comment, signature_data
+        ))
+        file_path = os.path.join(pdf_folder, f"maintenance_form_{ticket_id}_{digest}.pdf")
+        if os.path.exists(file_path):
+            return file_path
         
-        # إضافة الخطوط
+        # نسخة من قالب النموذج (الخطوط والترويسة والشعار والعنوان مرسومة مسبقاً في maintenance_pdf.py)
+        pdf = new_form_pdf('form')
+        draw_maintenance_form(pdf, ticket, problem_solved, problem_reasons, technician_comment, signature_data)
+        
+        # ----- حفظ الملف -----
+        # التأكد من وجود المجلد
+        if not os.path.exists(pdf_folder):
+            os.makedirs(pdf_folder)
+        
+        # الكتابة في ملف مؤقت ثم إعادة تسميته حتى لا يُستخدم ملف غير مكتمل إذا حُفظ النموذج مرتين معاً
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        pdf.output(temp_path)
+        os.replace(temp_path, file_path)
+        
+        return file_path
+    
+    def maintenance_form_inputs(ticket, problem_solved, problem_reasons, technician_comment, signature_data):
+        """كل القيم التي يرسمها draw_maintenance_form (أي تغيير فيها يعني ملفاً جديداً)"""
+        return [
+            ticket.id,
+            ticket.beneficiary.name if ticket.beneficiary else None,
+            ticket.beneficiary.phone if ticket.beneficiary else None,
+            ticket.department.name if ticket.department else None,
+            ticket.section.name if ticket.section else None,
+            ticket.created_at.strftime('%Y/%m/%d'),
+            ticket.priority.name,
+            priority_code(ticket.priority_id),
+            ticket.contact_method,
+            ticket.category.name if ticket.category else None,
+            ticket.subcategory.name if ticket.subcategory else None,
+            ticket.description,
+            ticket.assignee.name if ticket.assignee else None,
+            technician_comment,
+            bool(problem_solved),
+            problem_reasons,
+            signature_data,
+            # تاريخ اليوم مطبوع في النموذج
+            datetime.now().strftime('%Y/%m/%d'),
+        ]
+    
+    def draw_maintenance_form(pdf, ticket, problem_solved, problem_reasons, technician_comment, signature_data):
+        """رسم حقول نموذج الصيانة للبلاغ في الصفحة الحالية (الترويسة مرسومة مسبقاً في الصفحة)"""
         basedir = os.path.abspath(os.path.dirname(__file__))
-        pdf.add_font('Arial', '', os.path.join(basedir, 'static/fonts/arial.ttf'), uni=True)
-        pdf.add_font('Arial', 'B', os.path.join(basedir, 'static/fonts/arialbd.ttf'), uni=True)
-        
-        # دالة مساعدة للكتابة بالعربية
-        def arabic_text(text, rtl=True):
-            if not text:
-                return ""
-            if rtl:
-                reshaped_text = arabic_reshaper.reshape(str(text))
-                return get_display(reshaped_text)
-            return str(text)
         
         # تعيين ألوان التصميم
         header_background = (24, 116, 205)  # لون أزرق للعناوين
@@ -197,45 +313,13 @@ def add_maintenance_routes(app):
         success_color = (46, 139, 87)      # لون أخضر لخيار "نعم"
         danger_color = (220, 20, 60)       # لون أحمر لخيار "لا"
         
-        # تحديد الهوامش للتأكد من أن كل شيء يظهر في صفحة واحدة
-        pdf.set_margins(10, 10, 10)
-        
-        # ----- 1. ترويسة النموذج (تم تعديلها) -----
-        # لا توجد خلفية زرقاء للترويسة (تم إزالتها)
-        
-        # رقم البلاغ في الجهة اليسرى
+        # ----- 1. ترويسة النموذج -----
+        # رقم البلاغ في الجهة اليسرى (بقية الترويسة في القالب)
         pdf.set_font('Arial', 'B', 10)
-        pdf.set_text_color(0, 0, 0)  # تم تغيير لون النص إلى الأسود
+        pdf.set_text_color(0, 0, 0)
         pdf.set_xy(10, 10)
         pdf.cell(30, 8, arabic_text(f'رقم البلاغ: {ticket.id}'), 0, 0, 'L')
         
-        # اسم الجهة في الجهة اليمنى
-        pdf.set_font('Arial', 'B', 10)
-        pdf.set_xy(140, 10)
-        pdf.cell(60, 6, arabic_text('المملكة العربية السعودية'), 0, 1, 'R')
-        pdf.set_xy(140, 15)
-        pdf.cell(60, 5, arabic_text('وزارة الداخلية'), 0, 1, 'R')
-        pdf.set_font('Arial', '', 8)
-        pdf.set_xy(140, 20)
-        pdf.cell(60, 4, arabic_text('المديرية العامة للسجون'), 0, 1, 'R')
-        pdf.set_xy(140, 24)
-        pdf.cell(60, 4, arabic_text('مديرية السجون بمنطقة جازان'), 0, 1, 'R')
-        pdf.set_xy(140, 28)
-        pdf.cell(60, 4, arabic_text('إدارة التقنية والذكاء الإصطناعي'), 0, 1, 'R')
-        pdf.set_xy(140, 32)
-        pdf.cell(60, 4, arabic_text('شعبة الدعم الفني'), 0, 1, 'R')
-        
-        # إضافة الشعار في وسط الترويسة
-        logo_path = os.path.join(basedir, 'static/images/moi_logo.png')
-        if os.path.exists(logo_path):
-            pdf.image(logo_path, x=95, y=15, w=20)
-        
-        # عنوان النموذج أسفل الشعار
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_text_color(primary_color[0], primary_color[1], primary_color[2])  # لون أزرق للعنوان
-        pdf.set_xy(60, 37)  # تم تعديل موضع العنوان ليكون أسفل الشعار
-        pdf.cell(90, 10, arabic_text('نموذج طلب صيانة الدعم الفني'), 0, 0, 'C')
-        
         # ----- 2. معلومات مقدم الطلب -----
         current_y = 50  # تم زيادة القيمة لإعطاء مساحة كافية بعد الترويسة
         
@@ -319,10 +403,11 @@ def add_maintenance_routes(app):
         
         # لون خلفية الأولوية حسب نوعها
         priority_name = ticket.priority.name
-        if priority_name == 'عالية':
+        ticket_priority = priority_code(ticket.priority_id)
+        if ticket_priority == 'high':
             pdf.set_fill_color(255, 200, 200)  # لون خلفية أحمر فاتح للأولوية العالية
             pdf.set_text_color(200, 0, 0)      # لون نص أحمر للأولوية العالية
-        elif priority_name == 'متوسطة':
+        elif ticket_priority == 'medium':
             pdf.set_fill_color(255, 235, 200)  # لون خلفية برتقالي فاتح للأولوية المتوسطة
             pdf.set_text_color(200, 100, 0)    # لون نص برتقالي للأولوية المتوسطة
         else:
@@ -602,23 +687,6 @@ def add_maintenance_routes(app):
         
         # إعادة لون النص الأصلي
         pdf.set_text_color(text_color[0], text_color[1], text_color[2])
-        
-        # ----- حفظ الملف -----
-        basedir = os.path.abspath(os.path.dirname(__file__))
-        pdf_folder = os.path.join(basedir, 'uploads')
-        
-        # التأكد من وجود المجلد
-        if not os.path.exists(pdf_folder):
-            os.makedirs(pdf_folder)
-        
-        # إنشاء اسم فريد للملف
-        filename = f"maintenance_form_{ticket_id}_{uuid.uuid4().hex}.pdf"
-        file_path = os.path.join(pdf_folder, filename)
-        
-        # حفظ الملف
-        pdf.output(file_path)
-        
-        return file_path
 
     def save_signature_image(ticket_id, signature_data, user_id):
         """حفظ صورة التوقيع وإرجاع المسار"""
@@ -641,6 +709,7 @@ def add_maintenance_routes(app):
                 os.makedirs(upload_folder)
             
             # حفظ الصورة
+            from PIL import Image
             img = Image.open(io.BytesIO(signature_bytes))
             img.save(file_path)
             
@@ -668,47 +737,14 @@ def add_maintenance_routes(app):
         """إنشاء ملف PDF لنموذج الصيانة"""
         ticket = Ticket.query.get_or_404(ticket_id)
         
-        # إنشاء ملف PDF جديد
-        pdf = FPDF(orientation='P', unit='mm', format='A4')
-        pdf.add_page()
-        
-        # إضافة الخطوط
+        # نسخة من قالب التصميم القديم (الخطوط والترويسة والشعار والعنوان مرسومة مسبقاً)
+        pdf = new_form_pdf('classic')
         basedir = os.path.abspath(os.path.dirname(__file__))
-        pdf.add_font('Arial', '', os.path.join(basedir, 'static/fonts/arial.ttf'), uni=True)
-        pdf.add_font('Arial', 'B', os.path.join(basedir, 'static/fonts/arialbd.ttf'), uni=True)
-        
-        # دالة مساعدة للكتابة بالعربية
-        def arabic_text(text, rtl=True):
-            if not text:
-                return ""
-            if rtl:
-                reshaped_text = arabic_reshaper.reshape(str(text))
-                return get_display(reshaped_text)
-            return str(text)
         
         # تحديد الألوان المستخدمة
         header_color = (0, 73, 144)  # أزرق غامق
         subheader_color = (0, 112, 192)  # أزرق فاتح
         
-        # إنشاء النموذج بنفس الأسلوب القديم
-        # الترويسة
-        pdf.set_font('Arial', 'B', 14)
-        pdf.set_text_color(header_color[0], header_color[1], header_color[2])
-        pdf.set_xy(110, 10)
-        pdf.cell(90, 6, arabic_text('المملكة العربية السعودية'), 0, 1, 'R')
-        pdf.set_xy(110, 16)
-        pdf.cell(90, 6, arabic_text('وزارة الداخلية'), 0, 1, 'R')
-        pdf.set_xy(110, 22)
-        pdf.set_font('Arial', '', 12)
-        pdf.cell(90, 6, arabic_text('المديرية العامة للسجون'), 0, 1, 'R')
-        pdf.set_xy(110, 28)
-        pdf.cell(90, 6, arabic_text('مديرية السجون بمنطقة جازان'), 0, 1, 'R')
-        
-        # الشعار
-        logo_path = os.path.join(basedir, 'static/images/moi_logo.png')
-        if os.path.exists(logo_path):
-            pdf.image(logo_path, x=85, y=10, w=30)
-        
         # رقم البلاغ والتاريخ
         pdf.set_font('Arial', 'B', 12)
         pdf.set_text_color(0, 0, 0)
@@ -719,12 +755,6 @@ def add_maintenance_routes(app):
         pdf.set_xy(10, 25)
         pdf.cell(60, 6, arabic_text(f'التاريخ: {current_date}'), 0, 1, 'L')
         
-        # عنوان النموذج
-        pdf.set_y(45)
-        pdf.set_font('Arial', 'B', 18)
-        pdf.set_text_color(header_color[0], header_color[1], header_color[2])
-        pdf.cell(0, 10, arabic_text('نموذج طلب صيانة الدعم الفني'), 0, 1, 'C')
-        
         # توحيد حجم خط رؤوس الجداول
         header_font_size = 12
         
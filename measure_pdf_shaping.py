@@ -0,0 +1,99 @@
+"""
+measure_pdf_shaping.py - قياس زمن تشكيل النصوص العربية لكل نموذج صيانة PDF
+
+النصوص الثابتة تُقرأ من استدعاءات arabic_text('...') في دوال بناء النموذج، وتُضاف إليها
+حقول متغيرة لبلاغ مختلف في كل تكرار (الاسم والقسم والوصف ورقم البلاغ). يُقارن:
+التشكيل المباشر بالمكتبة لكل نص كما كان سابقاً، وأول نموذج في العملية، والنماذج التالية.
+
+    python measure_pdf_shaping.py
+    python measure_pdf_shaping.py --forms 50
+"""
+
+import argparse
+import ast
+import os
+import statistics
+import time
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+import maintenance_pdf
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+# (الملف، الدوال) التي ترسم نموذج الصيانة الموقّع
+FORM_FUNCTIONS = (
+    ('maintenance_pdf.py', ('_draw_form_header',)),
+    ('maintenance_routes.py', ('draw_maintenance_form',)),
+)
+
+
+def form_labels():
+    """النصوص الثابتة في النموذج: الوسائط النصية الحرفية لاستدعاءات arabic_text"""
+    labels = []
+    for filename, functions in FORM_FUNCTIONS:
+        with open(os.path.join(directory, filename), encoding='utf-8') as source:
+            tree = ast.parse(source.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef) and node.name in functions:
+                for call in ast.walk(node):
+                    if (isinstance(call, ast.Call) and getattr(call.func, 'id', None) == 'arabic_text'
+                            and call.args and isinstance(call.args[0], ast.Constant)):
+                        labels.append(call.args[0].value)
+    return labels
+
+
+def form_fields(number):
+    """الحقول المتغيرة لبلاغ تجريبي (تختلف في كل نموذج)"""
+    return [
+        f'رقم البلاغ: {number}',
+        f'مستفيد تجريبي {number}',
+        f'الإدارة العامة / القسم {number % 7}',
+        f'05{number:08d}',
+        f'2025/{number % 12 + 1:02d}/{number % 28 + 1:02d}',
+        f'الجهاز رقم {number} لا يعمل بعد انقطاع الكهرباء ويحتاج إلى فحص',
+        f'تم استبدال مزود الطاقة للجهاز {number}',
+        'عالية',
+        'حضور شخصي',
+        f'فني الصيانة {number % 3}',
+    ]
+
+
+def library_shape(text):
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def time_forms(shape, labels, forms, first_number):
+    """زمن تشكيل نصوص كل نموذج بالملي ثانية"""
+    times = []
+    for number in range(first_number, first_number + forms):
+        texts = labels + form_fields(number)
+        started = time.perf_counter()
+        for text in texts:
+            shape(text)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس زمن تشكيل النصوص العربية لكل نموذج صيانة')
+    parser.add_argument('--forms', type=int, default=20, help='عدد النماذج في كل قياس')
+    args = parser.parse_args()
+
+    labels = form_labels()
+    print(f'نصوص ثابتة في النموذج: {len(labels)}، حقول متغيرة: {len(form_fields(0))}')
+
+    uncached = time_forms(library_shape, labels, args.forms, 1)
+    maintenance_pdf.shape_arabic.cache_clear()
+    first = time_forms(maintenance_pdf.arabic_text, labels, 1, 1)
+    cached = time_forms(maintenance_pdf.arabic_text, labels, args.forms, 2)
+
+    print(f"{'بدون ذاكرة مؤقتة':<22} {statistics.median(uncached):8.2f} ms لكل نموذج")
+    print(f"{'أول نموذج في العملية':<22} {first[0]:8.2f} ms")
+    print(f"{'النماذج التالية':<22} {statistics.median(cached):8.2f} ms لكل نموذج")
+    print(f"الذاكرة المؤقتة: {maintenance_pdf.shape_arabic.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
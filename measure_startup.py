@@ -0,0 +1,102 @@
+"""
+measure_startup.py - قياس زمن استيراد التطبيق والذاكرة (RSS) لكل عملية gunicorn
+
+كل قياس يتم في عملية بايثون جديدة (كما يحدث لكل عملية عند التشغيل بدون --preload)،
+وتُعرض القيمة الوسطى لعدة تكرارات. يمكن مقارنة الشجرة الحالية بإصدار سابق من git:
+
+    python measure_startup.py
+    python measure_startup.py --compare HEAD~1 --runs 7
+
+تُستخدم قاعدة بيانات SQLite مؤقتة حتى لا يتأثر ملف fixltpro.db.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+HEAVY_MODULES = ('fpdf', 'arabic_reshaper', 'bidi', 'openpyxl', 'PIL')
+
+# يُنفذ داخل العملية الجديدة: زمن "import app" والذاكرة بعده والمكتبات الثقيلة المحملة
+CHILD_CODE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+rss = None
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) / 1024
+except OSError:
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+print(json.dumps({
+    'import_ms': elapsed * 1000,
+    'rss_mb': rss,
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(directory, runs):
+    """تشغيل القياس runs مرة في المجلد وإرجاع القيم الوسطى"""
+    results = []
+    with tempfile.TemporaryDirectory() as data_directory:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(data_directory, 'measure.db')
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, '-c', CHILD_CODE], cwd=directory, env=env,
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    rss_values = [result['rss_mb'] for result in results if result['rss_mb'] is not None]
+    return {
+        'import_ms': statistics.median(result['import_ms'] for result in results),
+        'rss_mb': statistics.median(rss_values) if rss_values else None,
+        'heavy': results[-1]['heavy'],
+    }
+
+
+def export_revision(revision, directory):
+    """استخراج ملفات إصدار من git إلى مجلد مؤقت"""
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], capture_output=True, check=True).stdout
+    archive_path = os.path.join(directory, 'revision.tar')
+    with open(archive_path, 'wb') as archive_file:
+        archive_file.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(directory)
+
+
+def print_result(label, result):
+    rss = f"{result['rss_mb']:.1f} MB" if result['rss_mb'] is not None else 'غير متاح'
+    heavy = ', '.join(result['heavy']) or '-'
+    print(f"{label:<20} import: {result['import_ms']:8.1f} ms   RSS: {rss:>10}   مكتبات ثقيلة محملة: {heavy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس زمن استيراد التطبيق والذاكرة لكل عملية')
+    parser.add_argument('--runs', type=int, default=5, help='عدد التكرارات (تُعرض القيمة الوسطى)')
+    parser.add_argument('--compare', metavar='REVISION', help='إصدار git للمقارنة (مثل HEAD~1)')
+    args = parser.parse_args()
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if args.compare:
+        with tempfile.TemporaryDirectory() as revision_directory:
+            export_revision(args.compare, revision_directory)
+            print_result(args.compare, measure(revision_directory, args.runs))
+    print_result('الشجرة الحالية', measure(directory, args.runs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+migrations.py - ترحيلات قاعدة البيانات المرقمة لقواعد البيانات القائمة (SQLite و PostgreSQL)
+
+setup_api يحذف الجداول ويعيد إنشاءها، لذلك لا يصلح لتحديث قاعدة بيانات فيها بيانات فعلية.
+كل ترحيل هنا له رقم إصدار ثابت ويُسجل في جدول schema_migrations بعد تطبيقه، فلا يُنفذ
+مرة أخرى. الترحيلات تُطبق عند بدء التشغيل ويمكن تشغيلها يدوياً بالأمر flask migrate-db.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+from models import db, Ticket, Comment, Attachment, ReportJob, SchemaMigration
+
+
+def _create_indexes(*tables):
+    """إنشاء فهارس الجداول المعرفة في models.py إذا لم تكن موجودة"""
+    inspector = inspect(db.engine)
+    for table in tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _add_hot_column_indexes():
+    _create_indexes(Ticket.__table__, Comment.__table__, Attachment.__table__, ReportJob.__table__)
+
+
+# (رقم الإصدار، الوصف، دالة الترحيل) - تُضاف الترحيلات الجديدة في النهاية بأرقام متزايدة
+MIGRATIONS = [
+    (1, 'فهارس أعمدة البلاغات والتعليقات والمرفقات ومهام التقارير الأكثر استخداماً', _add_hot_column_indexes),
+]
+
+
+def applied_migrations():
+    """أرقام الترحيلات المطبقة على قاعدة البيانات"""
+    return {version for (version,) in db.session.query(SchemaMigration.version)}
+
+
+def run_migrations():
+    """
+    تطبيق الترحيلات التي لم تُطبق بعد بالترتيب، كل ترحيل في معاملة مستقلة
+
+    قاعدة البيانات الجديدة (قبل setup_api) لا تحتاج لترحيل لأن create_all ينشئ كل شيء.
+
+    Returns:
+        list: أرقام الترحيلات التي طُبقت الآن
+    """
+    if not inspect(db.engine).has_table(Ticket.__tablename__):
+        return []
+
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied = applied_migrations()
+
+    applied_now = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            upgrade()
+            db.session.add(SchemaMigration(version=version, name=name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied_now.append(version)
+    return applied_now
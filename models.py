@@ -5,9 +5,10 @@ models.py - نماذج قاعدة البيانات لنظام Fixltpro للدع
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from db_routing import RoutingSession
 
-# إنشاء كائن قاعدة البيانات
-db = SQLAlchemy()
+# إنشاء كائن قاعدة البيانات (الجلسة توجه قراءات التقارير إلى نسخة القراءة إن وُجدت)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """نموذج المستخدم"""
@@ -123,6 +124,19 @@ class Beneficiary(db.Model):
 class Ticket(db.Model):
     """نموذج البلاغ"""
     __tablename__ = 'tickets'
+    __table_args__ = (
+        # فهرس مركب لاستعلام البلاغات المتأخرة (الحالة ثم الموعد النهائي)
+        db.Index('ix_tickets_status_due_date', 'status_id', 'due_date'),
+        # قائمة البلاغات في لوحة المدير مرتبة بتاريخ الإنشاء ثم المعرف، ومرشحات فترة التقارير
+        db.Index('ix_tickets_created_at_id', 'created_at', 'id'),
+        # بلاغاتي مرتبة بتاريخ الإنشاء
+        db.Index('ix_tickets_created_by_created_at', 'created_by_id', 'created_at'),
+        # لوحة الفني وتقاريره وأداء الفنيين
+        db.Index('ix_tickets_assigned_to_status', 'assigned_to_id', 'status_id'),
+        db.Index('ix_tickets_priority_id', 'priority_id'),
+        db.Index('ix_tickets_category_id', 'category_id'),
+        db.Index('ix_tickets_due_date', 'due_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100))  # جعلها اختيارية
@@ -143,6 +157,7 @@ class Ticket(db.Model):
     
     comments = db.relationship('Comment', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
     attachments = db.relationship('Attachment', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
+    form_render_jobs = db.relationship('FormRenderJob', backref='ticket', lazy='dynamic', cascade='all, delete-orphan')
     contact_method = db.Column(db.String(50), nullable=True)
     
     # إضافات جديدة لنموذج الصيانة
@@ -167,9 +182,95 @@ class Ticket(db.Model):
         ).order_by(Comment.created_at.desc()).first()
 
 
+class TicketCounter(db.Model):
+    """نموذج عدادات البلاغات المجمعة (يتم تحديثها تلقائياً عند إضافة أو تعديل أو حذف بلاغ)"""
+    __tablename__ = 'ticket_counters'
+    
+    # البُعد: status, priority, creator_status, assignee_status
+    dimension = db.Column(db.String(30), primary_key=True)
+    key_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # معرف الحالة أو الأولوية أو المستخدم
+    sub_key_id = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)  # معرف الحالة للأبعاد الخاصة بالمستخدم
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TicketDailyRollup(db.Model):
+    """نموذج التجميع اليومي للبلاغات حسب التصنيف والحالة والأولوية والفني (لتقارير الفترات الطويلة)"""
+    __tablename__ = 'ticket_daily_rollups'
+    
+    day = db.Column(db.Date, primary_key=True)  # يوم إنشاء البلاغ
+    category_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    priority_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assignee_id = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)  # 0 للبلاغات غير المعينة
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CacheVersion(db.Model):
+    """نموذج أرقام إصدارات البيانات المخزنة مؤقتاً في كل عملية (يزداد الرقم عند تغيير البيانات)"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SchemaMigration(db.Model):
+    """نموذج ترحيلات قاعدة البيانات المطبقة (رقم الإصدار واسم الترحيل)"""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ReportJob(db.Model):
+    """نموذج مهام توليد التقارير في الخلفية (مشتركة بين جميع عمليات الخادم)"""
+    __tablename__ = 'report_jobs'
+    __table_args__ = (
+        # حذف المهام القديمة والبحث عن المهام المعلقة حسب وقت الإنشاء
+        db.Index('ix_report_jobs_created_at', 'created_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)  # معرف المهمة
+    params = db.Column(db.Text, nullable=False)  # مرشحات التقرير بصيغة JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # نسبة الإنجاز من 0 إلى 100
+    result = db.Column(db.Text)  # بيانات التقرير بصيغة JSON عند الانتهاء
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+
+class FormRenderJob(db.Model):
+    """نموذج مهام إنشاء ملف PDF لنموذج الصيانة في الخلفية (مشتركة بين جميع عمليات الخادم)"""
+    __tablename__ = 'form_render_jobs'
+    __table_args__ = (
+        # المهام المعروضة في صفحة البلاغ
+        db.Index('ix_form_render_jobs_ticket_id', 'ticket_id'),
+        # حذف المهام القديمة حسب وقت الإنشاء
+        db.Index('ix_form_render_jobs_created_at', 'created_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)  # معرف المهمة
+    ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id'), nullable=False)
+    params = db.Column(db.Text, nullable=False)  # بيانات النموذج بصيغة JSON (تشمل التوقيع)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # عدد محاولات الإنشاء
+    error = db.Column(db.Text)  # خطأ آخر محاولة فاشلة
+    attachment_id = db.Column(db.Integer, db.ForeignKey('attachments.id', ondelete='SET NULL'))  # ملف PDF الناتج
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+
 class Attachment(db.Model):
     """نموذج المرفقات"""
     __tablename__ = 'attachments'
+    __table_args__ = (
+        db.Index('ix_attachments_ticket_id', 'ticket_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
@@ -190,6 +291,10 @@ class Attachment(db.Model):
 class Comment(db.Model):
     """نموذج التعليقات على البلاغات"""
     __tablename__ = 'comments'
+    __table_args__ = (
+        # تعليقات البلاغ، وآخر تعليق للفني المسؤول (البلاغ ثم المستخدم ثم التاريخ)
+        db.Index('ix_comments_ticket_user_created', 'ticket_id', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
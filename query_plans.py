@@ -0,0 +1,63 @@
+"""
+query_plans.py - عرض خطط تنفيذ الاستعلامات الرئيسية (EXPLAIN) للتحقق من استخدام الفهارس
+"""
+
+from datetime import datetime, timedelta
+from models import db, Ticket, Comment, Attachment, User
+from ticket_queries import open_tickets_filter, overdue_tickets_query
+
+
+def _sample_ids():
+    """معرفات حقيقية من قاعدة البيانات لتكون الخطط قريبة من الاستخدام الفعلي"""
+    ticket = Ticket.query.order_by(Ticket.id.desc()).first()
+    technician = User.query.filter_by(user_type='maintenance').first()
+    employee = User.query.filter_by(user_type='employee').first()
+    return {
+        'ticket_id': ticket.id if ticket else 1,
+        'creator_id': ticket.created_by_id if ticket else (employee.id if employee else 1),
+        'technician_id': technician.id if technician else 1,
+        'category_id': ticket.category_id if ticket else 1,
+    }
+
+
+def main_queries(now=None):
+    """الاستعلامات الرئيسية للوحات والتقارير وصفحة البلاغ كقاموس (الاسم -> الاستعلام)"""
+    now = now or datetime.utcnow()
+    ids = _sample_ids()
+    start = now - timedelta(days=30)
+
+    return {
+        'admin_dashboard': Ticket.query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(25),
+        'my_tickets': Ticket.query.filter_by(created_by_id=ids['creator_id']).order_by(Ticket.created_at.desc()),
+        'maintenance_dashboard': Ticket.query.filter_by(assigned_to_id=ids['technician_id']),
+        'open_tickets': db.session.query(db.func.count(Ticket.id)).filter(open_tickets_filter()),
+        'overdue_tickets': overdue_tickets_query(now).limit(50),
+        'report_period': db.session.query(
+            Ticket.category_id, db.func.count(Ticket.id)
+        ).filter(Ticket.created_at >= start).group_by(Ticket.category_id),
+        'report_category': db.session.query(db.func.count(Ticket.id)).filter(
+            Ticket.category_id == ids['category_id'], Ticket.created_at >= start
+        ),
+        'technician_comment': Comment.query.filter_by(
+            ticket_id=ids['ticket_id'], user_id=ids['technician_id']
+        ).order_by(Comment.created_at.desc()).limit(1),
+        'ticket_comments': Comment.query.filter_by(ticket_id=ids['ticket_id']).order_by(Comment.created_at),
+        'ticket_attachments': Attachment.query.filter_by(ticket_id=ids['ticket_id']),
+    }
+
+
+def explain(query):
+    """خطة تنفيذ استعلام كقائمة أسطر نصية"""
+    dialect = db.engine.dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(db.text(prefix + sql)).fetchall()
+    if dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+def explain_main_queries():
+    """خطط تنفيذ جميع الاستعلامات الرئيسية كقائمة (الاسم، أسطر الخطة)"""
+    return [(name, explain(query)) for name, query in main_queries().items()]
@@ -0,0 +1,116 @@
+"""
+reference_data.py - ذاكرة مؤقتة للبيانات المرجعية (التصنيفات، الإدارات، الأولويات، الحالات، الفنيين)
+
+تُحمّل البيانات مرة واحدة في كل عملية (worker) كنسخ ثابتة للقراءة فقط، وتُعاد قراءتها
+عندما يتغير رقم الإصدار المحفوظ في جدول cache_versions. مسارات الإضافة والتعديل والحذف
+تزيد رقم الإصدار عبر bump_reference_data_version فتلاحظ بقية العمليات التغيير خلال
+REFERENCE_DATA_CHECK_INTERVAL ثانية.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from models import db, User, TicketPriority, TicketStatus, Category, SubCategory, Department, Section, CacheVersion
+from report_cache import invalidate_report_cache
+
+VERSION_NAME = 'reference_data'
+
+# نسخ ثابتة تحتوي على الحقول التي تستخدمها الصفحات فقط
+CategoryRef = namedtuple('CategoryRef', 'id name')
+SubCategoryRef = namedtuple('SubCategoryRef', 'id name category_id')
+DepartmentRef = namedtuple('DepartmentRef', 'id name')
+SectionRef = namedtuple('SectionRef', 'id name department_id')
+PriorityRef = namedtuple('PriorityRef', 'id name response_time color is_custom')
+StatusRef = namedtuple('StatusRef', 'id name')
+StaffRef = namedtuple('StaffRef', 'id name email phone')
+
+_lock = threading.Lock()
+_cache = {'version': None, 'checked_at': 0, 'data': None}
+
+
+def ensure_cache_versions_table():
+    """إنشاء جدول أرقام الإصدارات في قاعدة بيانات قائمة إذا لم يكن موجوداً"""
+    CacheVersion.__table__.create(db.engine, checkfirst=True)
+
+
+def get_cache_version(name=VERSION_NAME):
+    """رقم الإصدار الحالي المحفوظ في قاعدة البيانات"""
+    return db.session.query(CacheVersion.version).filter_by(name=name).scalar() or 0
+
+
+def bump_cache_version(name=VERSION_NAME):
+    """زيادة رقم الإصدار وحفظه"""
+    updated = CacheVersion.query.filter_by(name=name).update({'version': CacheVersion.version + 1})
+    if not updated:
+        db.session.add(CacheVersion(name=name, version=1))
+    db.session.commit()
+
+
+def _load_reference_data():
+    """قراءة البيانات المرجعية من قاعدة البيانات"""
+    return {
+        'categories': tuple(
+            CategoryRef(c.id, c.name) for c in Category.query.order_by(Category.id)
+        ),
+        'subcategories': tuple(
+            SubCategoryRef(s.id, s.name, s.category_id) for s in SubCategory.query.order_by(SubCategory.id)
+        ),
+        'departments': tuple(
+            DepartmentRef(d.id, d.name) for d in Department.query.order_by(Department.id)
+        ),
+        'sections': tuple(
+            SectionRef(s.id, s.name, s.department_id) for s in Section.query.order_by(Section.id)
+        ),
+        'priorities': tuple(
+            PriorityRef(p.id, p.name, p.response_time, p.color, p.is_custom)
+            for p in TicketPriority.query.order_by(TicketPriority.id)
+        ),
+        'statuses': tuple(
+            StatusRef(s.id, s.name) for s in TicketStatus.query.order_by(TicketStatus.id)
+        ),
+        'maintenance_staff': tuple(
+            StaffRef(u.id, u.name, u.email, u.phone)
+            for u in User.query.filter_by(user_type='maintenance').order_by(User.id)
+        )
+    }
+
+
+def get_reference_data(check_version=False):
+    """
+    البيانات المرجعية المخزنة في هذه العملية
+
+    Args:
+        check_version: التحقق من رقم الإصدار الآن حتى قبل انتهاء REFERENCE_DATA_CHECK_INTERVAL
+            (مثلاً عند طلب معرف غير موجود في البيانات المخزنة وقد أضافته عملية أخرى للتو)
+
+    Returns:
+        dict: categories, subcategories, departments, sections, priorities, statuses,
+        maintenance_staff كل منها tuple من النسخ الثابتة مرتبة حسب المعرف، و version
+        رقم الإصدار الذي قُرئت عنده البيانات
+    """
+    interval = current_app.config.get('REFERENCE_DATA_CHECK_INTERVAL', 5)
+    with _lock:
+        now = time.monotonic()
+        if _cache['data'] is not None and not check_version and now - _cache['checked_at'] < interval:
+            return _cache['data']
+
+        version = get_cache_version()
+        if _cache['data'] is None or version != _cache['version']:
+            _cache['data'] = _load_reference_data()
+            _cache['data']['version'] = version
+            _cache['version'] = version
+        _cache['checked_at'] = now
+        return _cache['data']
+
+
+def bump_reference_data_version():
+    """
+    تسجيل تغيير في البيانات المرجعية (يُستدعى بعد حفظ الإضافة أو التعديل أو الحذف)
+
+    التقارير المحفوظة تحتوي على أسماء التصنيفات والحالات والفنيين لذلك تُحذف أيضاً.
+    """
+    bump_cache_version()
+    with _lock:
+        _cache['data'] = None
+    invalidate_report_cache()
@@ -0,0 +1,167 @@
+"""
+report_cache.py - ذاكرة مؤقتة لنتائج صفحة التقارير حسب مرشحاتها
+
+كل عنصر له مدة صلاحية (TTL)، وعند امتلاء الذاكرة يُحذف الأقدم استخداماً (LRU).
+عند حفظ أي إضافة أو تعديل أو حذف لبلاغ تُحذف العناصر التي قد يتأثر بها التقرير فقط.
+الذاكرة خاصة بكل عملية (worker)، لذلك تحدّ مدة الصلاحية من قدم النتائج في العمليات الأخرى.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from models import Ticket
+
+# الحقول التي تحدد التقارير التي يظهر فيها البلاغ
+REPORT_FIELDS = ('category_id', 'priority_id', 'created_by_id', 'assigned_to_id', 'created_at')
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # المفتاح -> (وقت الحساب، وقت الانتهاء، البيانات)
+_settings = {'max_entries': 64, 'ttl': 300}
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+
+def configure_report_cache(max_entries=None, ttl=None):
+    """تعديل الحد الأقصى لعدد العناصر ومدة الصلاحية بالثواني"""
+    with _lock:
+        if max_entries is not None:
+            _settings['max_entries'] = max(1, int(max_entries))
+        if ttl is not None:
+            _settings['ttl'] = max(0, int(ttl))
+        while len(_entries) > _settings['max_entries']:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def report_cache_key(date_range, category_id=None, user_id=None, priority_id=None, granularity=None):
+    """مفتاح موحد لمرشحات التقرير (القيم الفارغة أو الصفرية تعني عدم التصفية)"""
+    return (int(date_range), category_id or None, user_id or None, priority_id or None, granularity)
+
+
+def get_cached_report(key):
+    """
+    قراءة تقرير محفوظ
+
+    Returns:
+        dict أو None: بيانات التقرير إذا كانت موجودة وصالحة
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _stats['misses'] += 1
+            return None
+        if entry[1] <= now:
+            del _entries[key]
+            _stats['expirations'] += 1
+            _stats['misses'] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats['hits'] += 1
+        return entry[2]
+
+
+def store_report(key, report_data):
+    """حفظ نتيجة تقرير مع حذف الأقدم استخداماً عند الامتلاء"""
+    with _lock:
+        if _settings['ttl'] == 0:
+            return
+        _entries[key] = (datetime.utcnow(), time.monotonic() + _settings['ttl'], report_data)
+        _entries.move_to_end(key)
+        while len(_entries) > _settings['max_entries']:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def _is_affected(key, computed_at, values):
+    """هل يمكن أن يظهر بلاغ بهذه القيم في التقرير المحفوظ بهذا المفتاح"""
+    date_range, category_id, user_id, priority_id, granularity = key
+    if category_id and values['category_id'] != category_id:
+        return False
+    if priority_id and values['priority_id'] != priority_id:
+        return False
+    if user_id and user_id not in (values['created_by_id'], values['assigned_to_id']):
+        return False
+    created_at = values['created_at']
+    if created_at and created_at < computed_at - timedelta(days=date_range):
+        return False
+    return True
+
+
+def invalidate_report_cache(changed_values=None):
+    """
+    حذف التقارير المحفوظة
+
+    Args:
+        changed_values: قائمة بقيم REPORT_FIELDS للبلاغات التي تغيرت، أو None لحذف الكل
+    """
+    with _lock:
+        if changed_values is None:
+            stale = list(_entries)
+        else:
+            stale = [key for key, (computed_at, expires, data) in _entries.items()
+                     if any(_is_affected(key, computed_at, values) for values in changed_values)]
+        for key in stale:
+            del _entries[key]
+        _stats['invalidations'] += len(stale)
+    return len(stale)
+
+
+def report_cache_stats():
+    """إحصائيات الذاكرة المؤقتة (الإصابات والإخفاقات ونسبة الإصابة وعدد العناصر)"""
+    with _lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_entries)
+        stats['max_entries'] = _settings['max_entries']
+        stats['ttl'] = _settings['ttl']
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = 0 if lookups == 0 else round((stats['hits'] / lookups) * 100, 1)
+    return stats
+
+
+def _record_change(target, values_list):
+    """تسجيل قيم البلاغ المتغير في الجلسة ليتم الحذف بعد نجاح الحفظ فقط"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('report_cache_changes', []).extend(values_list)
+
+
+def _current_values(target):
+    return {field: getattr(target, field) for field in REPORT_FIELDS}
+
+
+@event.listens_for(Ticket, 'after_insert')
+def _ticket_inserted(mapper, connection, target):
+    _record_change(target, [_current_values(target)])
+
+
+@event.listens_for(Ticket, 'after_update')
+def _ticket_updated(mapper, connection, target):
+    # أي تعديل (مثل الحالة أو الموعد النهائي) يغير التقرير، والقيم القديمة تحدد التقارير السابقة
+    state = inspect(target)
+    new_values = _current_values(target)
+    old_values = dict(new_values)
+    for field in REPORT_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            old_values[field] = history.deleted[0]
+    _record_change(target, [new_values] if old_values == new_values else [old_values, new_values])
+
+
+@event.listens_for(Ticket, 'after_delete')
+def _ticket_deleted(mapper, connection, target):
+    _record_change(target, [_current_values(target)])
+
+
+@event.listens_for(Session, 'after_commit')
+def _session_committed(session):
+    changes = session.info.pop('report_cache_changes', None)
+    if changes:
+        invalidate_report_cache(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _session_rolled_back(session, previous_transaction):
+    session.info.pop('report_cache_changes', None)
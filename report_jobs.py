@@ -0,0 +1,132 @@
+"""
+report_jobs.py - تشغيل حساب التقارير الكبيرة في الخلفية مع متابعة نسبة الإنجاز
+
+تُنفَّذ المهام في مجموعة خيوط (thread pool) داخل العملية التي استقبلت الطلب، وتُحفظ
+حالتها ونتيجتها في جدول report_jobs حتى يمكن متابعتها من أي عملية أخرى للخادم.
+"""
+
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import inspect
+from models import db, ReportJob, User
+
+PENDING_STATUSES = ('queued', 'running')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers):
+    """إنشاء مجموعة الخيوط عند أول استخدام (وليس عند الاستيراد) لتعمل بعد fork في gunicorn"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report-job')
+        return _executor
+
+
+def ensure_report_jobs_table():
+    """إنشاء جدول مهام التقارير في قاعدة بيانات قائمة إذا لم يكن موجوداً"""
+    # قبل setup_api لا يوجد جدول المستخدمين الذي يشير إليه الجدول (و PostgreSQL تتحقق من ذلك)
+    if not inspect(db.engine).has_table(User.__tablename__):
+        return False
+    ReportJob.__table__.create(db.engine, checkfirst=True)
+    return True
+
+
+def _update_job(job_id, **values):
+    ReportJob.query.filter_by(id=job_id).update(values)
+    db.session.commit()
+
+
+def _run_report_job(app, job_id, params, compute):
+    """تنفيذ المهمة داخل سياق التطبيق وتسجيل نسبة الإنجاز والنتيجة"""
+    with app.app_context():
+        try:
+            _update_job(job_id, status='running', progress=5)
+
+            def progress(percent):
+                _update_job(job_id, progress=int(percent))
+
+            result = compute(params, progress)
+            _update_job(job_id, status='done', progress=100, result=json.dumps(result), finished_at=datetime.utcnow())
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"خطأ في توليد التقرير في الخلفية: {str(e)}")
+            try:
+                _update_job(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            except Exception as update_error:
+                db.session.rollback()
+                app.logger.error(f"خطأ في تحديث حالة مهمة التقرير: {str(update_error)}")
+        finally:
+            db.session.remove()
+
+
+def submit_report_job(params, compute, user_id=None):
+    """
+    إضافة مهمة توليد تقرير
+
+    إذا كانت هناك مهمة قيد التنفيذ لنفس المرشحات تتم إعادتها بدلاً من إنشاء مهمة جديدة.
+
+    Args:
+        params: قاموس مرشحات التقرير (قابل للتحويل إلى JSON)
+        compute: دالة compute(params, progress) تعيد بيانات التقرير
+        user_id: معرف المستخدم الذي طلب التقرير
+
+    Returns:
+        ReportJob: المهمة الجديدة أو القائمة
+    """
+    app = current_app._get_current_object()
+    params_json = json.dumps(params, sort_keys=True)
+    now = datetime.utcnow()
+
+    job = ReportJob.query.filter(
+        ReportJob.params == params_json,
+        ReportJob.status.in_(PENDING_STATUSES),
+        ReportJob.created_at >= now - timedelta(seconds=app.config['REPORT_JOB_TIMEOUT'])
+    ).first()
+    if job:
+        return job
+
+    # حذف المهام القديمة
+    ReportJob.query.filter(
+        ReportJob.created_at < now - timedelta(seconds=app.config['REPORT_JOB_RETENTION'])
+    ).delete(synchronize_session=False)
+
+    job = ReportJob(id=uuid.uuid4().hex, params=params_json, status='queued', progress=0, created_by_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor(app.config['REPORT_JOB_WORKERS']).submit(_run_report_job, app, job.id, params, compute)
+    return job
+
+
+def report_job_status(job):
+    """حالة المهمة بصيغة قابلة للتحويل إلى JSON (المهمة المعلقة بعد انتهاء المهلة تعتبر فاشلة)"""
+    status = job.status
+    error = job.error
+    timeout = timedelta(seconds=current_app.config['REPORT_JOB_TIMEOUT'])
+    if status in PENDING_STATUSES and job.created_at and job.created_at < datetime.utcnow() - timeout:
+        status = 'failed'
+        error = 'انتهت مهلة توليد التقرير'
+
+    return {
+        'job_id': job.id,
+        'status': status,
+        'progress': 100 if status == 'done' else job.progress,
+        'error': error,
+        'params': json.loads(job.params),
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def report_job_result(job):
+    """بيانات التقرير الناتجة عن المهمة، أو None إذا لم تنته بعد"""
+    if job.status != 'done' or not job.result:
+        return None
+    return json.loads(job.result)
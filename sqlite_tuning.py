@@ -0,0 +1,138 @@
+"""
+sqlite_tuning.py - إعدادات أداء SQLite (PRAGMA) لكل اتصال جديد
+
+مع تشغيل عدة عمليات gunicorn على نفس ملف fixltpro.db يؤدي وضع السجل الافتراضي (rollback
+journal) إلى أخطاء "database is locked" عند الكتابة المتزامنة وإلى انتظار القراء أثناء
+الكتابة. وضع WAL يسمح للقراء بالعمل أثناء الكتابة، و busy_timeout يجعل الكاتب ينتظر
+بدلاً من الفشل فوراً. القيم تُقرأ من متغيرات البيئة SQLITE_* في app.py.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORE_MODES = ('DEFAULT', 'FILE', 'MEMORY')
+
+
+def sqlite_pragmas(config):
+    """
+    أوامر PRAGMA بالترتيب من إعدادات التطبيق بعد التحقق من القيم
+
+    busy_timeout أولاً حتى ينتظر تغيير journal_mode أي قفل قائم.
+    """
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    temp_store = config['SQLITE_TEMP_STORE'].upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'قيمة SQLITE_JOURNAL_MODE غير صحيحة: {journal_mode}')
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f'قيمة SQLITE_SYNCHRONOUS غير صحيحة: {synchronous}')
+    if temp_store not in TEMP_STORE_MODES:
+        raise ValueError(f'قيمة SQLITE_TEMP_STORE غير صحيحة: {temp_store}')
+
+    return [
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        ('journal_mode', journal_mode),
+        ('synchronous', synchronous),
+        ('cache_size', int(config['SQLITE_CACHE_SIZE'])),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('temp_store', temp_store),
+    ]
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """تنفيذ أوامر PRAGMA عند فتح كل اتصال جديد بمحرك SQLite (لا شيء لقواعد البيانات الأخرى)"""
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return True
+
+
+def current_sqlite_pragmas(engine):
+    """قيم PRAGMA الفعلية على اتصال جديد (للتحقق من الإعدادات)"""
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+        }
+
+
+def run_concurrency_check(pragmas, duration=2.0, readers=4, writers=2):
+    """
+    تشغيل قراء وكتّاب متزامنين على قاعدة بيانات مؤقتة بنفس إعدادات PRAGMA
+
+    كل كاتب يحجز قفل الكتابة (BEGIN EXCLUSIVE، وهو القفل الذي يأخذه الحفظ في وضع السجل
+    الافتراضي) ويضيف صفوفاً ثم ينتظر قليلاً قبل الحفظ، والقراء يعدّون الصفوف باستمرار.
+    في وضع WAL لا ينتظر القراء الكتّاب، وفي وضع DELETE ينتظرون حتى انتهاء الحفظ.
+
+    Returns:
+        dict: عدد عمليات القراءة والكتابة والأخطاء وأطول زمن قراءة بالملي ثانية
+    """
+    stats = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0, 'max_read_ms': 0.0}
+    stats_lock = threading.Lock()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine('sqlite:///' + os.path.join(directory, 'concurrency_check.db'), poolclass=NullPool)
+        install_sqlite_pragmas(engine, pragmas)
+        with engine.begin() as connection:
+            connection.exec_driver_sql('CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)')
+            connection.exec_driver_sql(
+                'INSERT INTO items (payload) SELECT hex(randomblob(32)) FROM '
+                '(WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000) SELECT i FROM n)'
+            )
+
+        deadline = time.monotonic() + duration
+
+        def reader():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as connection:
+                        connection.exec_driver_sql('SELECT count(*), max(id) FROM items').fetchall()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with stats_lock:
+                        stats['reads'] += 1
+                        stats['max_read_ms'] = max(stats['max_read_ms'], elapsed)
+                except OperationalError:
+                    with stats_lock:
+                        stats['read_errors'] += 1
+
+        def writer():
+            while time.monotonic() < deadline:
+                try:
+                    with engine.begin() as connection:
+                        connection.exec_driver_sql('BEGIN EXCLUSIVE')
+                        for _ in range(20):
+                            connection.exec_driver_sql("INSERT INTO items (payload) VALUES (hex(randomblob(32)))")
+                        time.sleep(0.02)
+                    with stats_lock:
+                        stats['writes'] += 1
+                except OperationalError:
+                    with stats_lock:
+                        stats['write_errors'] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    stats['max_read_ms'] = round(stats['max_read_ms'], 1)
+    return stats
@@ -26,6 +26,28 @@ document.addEventListener('DOMContentLoaded', function() {
     const previewContainer = document.querySelector('.preview-container');
     const previewDiv = document.getElementById('attachments-preview');
 
+    // شجرة التصنيفات الفرعية والأقسام المضمنة في الصفحة
+    const taxonomyData = document.getElementById('taxonomy-data');
+    const taxonomy = taxonomyData ? JSON.parse(taxonomyData.textContent) : { subcategories: {}, sections: {} };
+
+    // تعبئة قائمة منسدلة من عناصر الشجرة
+    function fillOptions(select, items, emptyText) {
+        if (items && items.length > 0) {
+            items.forEach(item => {
+                const option = document.createElement('option');
+                option.value = item.id;
+                option.textContent = item.name;
+                select.appendChild(option);
+            });
+        } else {
+            const option = document.createElement('option');
+            option.value = "";
+            option.textContent = emptyText;
+            option.disabled = true;
+            select.appendChild(option);
+        }
+    }
+
     // --- تهيئة طريقة استلام البلاغ ---
     if (contactMethodOptions.length > 0) {
         // تفعيل الخيار الأول افتراضيًا
@@ -154,30 +176,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 sectionSelect.innerHTML = '<option value="" selected disabled>-- اختر القسم --</option>';
                 
-                // جلب الأقسام من الخادم
-                fetch('/api/sections/' + departmentId)
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.sections && data.sections.length > 0) {
-                            // إضافة الأقسام إلى القائمة
-                            data.sections.forEach(section => {
-                                const option = document.createElement('option');
-                                option.value = section.id;
-                                option.textContent = section.name;
-                                sectionSelect.appendChild(option);
-                            });
-                        } else {
-                            // إضافة خيار "لا توجد أقسام"
-                            const option = document.createElement('option');
-                            option.value = "";
-                            option.textContent = "-- لا توجد أقسام --";
-                            option.disabled = true;
-                            sectionSelect.appendChild(option);
-                        }
-                    })
-                    .catch(error => {
-                        console.error('Error fetching sections:', error);
-                    });
+                // إضافة أقسام الإدارة من الشجرة المضمنة
+                fillOptions(sectionSelect, taxonomy.sections[departmentId], "-- لا توجد أقسام --");
             } else {
                 // تعطيل قائمة الأقسام وزر إضافة قسم
                 sectionSelect.disabled = true;
@@ -204,30 +204,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 subcategorySelect.innerHTML = '<option value="" selected disabled>-- اختر التصنيف الفرعي --</option>';
                 
-                // جلب التصنيفات الفرعية من الخادم
-                fetch('/api/subcategories/' + categoryId)
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.subcategories && data.subcategories.length > 0) {
-                            // إضافة التصنيفات الفرعية إلى القائمة
-                            data.subcategories.forEach(subcategory => {
-                                const option = document.createElement('option');
-                                option.value = subcategory.id;
-                                option.textContent = subcategory.name;
-                                subcategorySelect.appendChild(option);
-                            });
-                        } else {
-                            // إضافة خيار "لا توجد تصنيفات فرعية"
-                            const option = document.createElement('option');
-                            option.value = "";
-                            option.textContent = "-- لا توجد تصنيفات فرعية --";
-                            option.disabled = true;
-                            subcategorySelect.appendChild(option);
-                        }
-                    })
-                    .catch(error => {
-                        console.error('Error fetching subcategories:', error);
-                    });
+                // إضافة التصنيفات الفرعية من الشجرة المضمنة
+                fillOptions(subcategorySelect, taxonomy.subcategories[categoryId], "-- لا توجد تصنيفات فرعية --");
             } else {
                 // تعطيل قائمة التصنيفات الفرعية وزر إضافة تصنيف فرعي
                 subcategorySelect.disabled = true;
@@ -585,6 +563,9 @@ document.addEventListener('DOMContentLoaded', function() {
                     option.value = data.section.id;
                     option.textContent = data.section.name;
                     
+                    // حفظ القسم في الشجرة المضمنة
+                    (taxonomy.sections[departmentId] = taxonomy.sections[departmentId] || []).push(data.section);
+                    
                     // إضافة خيار القسم الجديد وتحديده
                     sectionSelect.innerHTML = '<option value="" disabled>-- اختر القسم --</option>';
                     sectionSelect.appendChild(option);
@@ -713,6 +694,9 @@ document.addEventListener('DOMContentLoaded', function() {
                     option.value = data.subcategory.id;
                     option.textContent = data.subcategory.name;
                     
+                    // حفظ التصنيف الفرعي في الشجرة المضمنة
+                    (taxonomy.subcategories[categoryId] = taxonomy.subcategories[categoryId] || []).push(data.subcategory);
+                    
                     // إضافة خيار التصنيف الفرعي الجديد وتحديده
                     subcategorySelect.innerHTML = '<option value="" disabled>-- اختر التصنيف الفرعي --</option>';
                     subcategorySelect.appendChild(option);
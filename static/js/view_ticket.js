@@ -440,4 +440,26 @@ document.addEventListener('DOMContentLoaded', function() {
     window.addEventListener('resize', function() {
         // setupMobileView();
     });
+    
+    // متابعة إنشاء ملف نموذج الصيانة في الخلفية وإعادة تحميل الصفحة عند انتهائه
+    document.querySelectorAll('[data-form-job-status="queued"], [data-form-job-status="running"]').forEach(function(jobAlert) {
+        var statusUrl = jobAlert.getAttribute('data-form-job-url');
+        
+        function pollFormJob() {
+            fetch(statusUrl)
+                .then(function(response) { return response.json(); })
+                .then(function(job) {
+                    if (job.status === 'done' || job.status === 'failed') {
+                        window.location.reload();
+                    } else {
+                        setTimeout(pollFormJob, 2000);
+                    }
+                })
+                .catch(function() {
+                    setTimeout(pollFormJob, 5000);
+                });
+        }
+        
+        setTimeout(pollFormJob, 2000);
+    });
 });
\ No newline at end of file
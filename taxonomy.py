@@ -0,0 +1,111 @@
+"""
+taxonomy.py - شجرة التصنيفات (تصنيف ← تصنيفات فرعية، إدارة ← أقسام) في الذاكرة
+
+تُبنى الشجرة من البيانات المرجعية المخزنة، لذلك يُعاد بناؤها تلقائياً بعد حفظ أي تعديل
+على التصنيفات أو الإدارات (bump_reference_data_version). تُستخدم لتوليد عنوان البلاغ دون
+استعلامات، وتُضمَّن في صفحة إنشاء البلاغ ككتلة JSON واحدة بدلاً من طلبات /api المتكررة.
+
+واجهات /api الخاصة بالتصنيفات تُرجع ETag مبنياً على رقم إصدار البيانات المرجعية، فيعيد
+المتصفح التحقق ويحصل على 304 ما دام الإصدار لم يتغير.
+"""
+
+import threading
+from jinja2.utils import htmlsafe_json_dumps
+from models import db, Ticket, Category, SubCategory, Department, Section
+from reference_data import get_reference_data
+
+# PostgreSQL ترفض النصوص الأطول من طول العمود (SQLite لا تتحقق منه)
+TITLE_MAX_LENGTH = Ticket.__table__.c.title.type.length
+
+_lock = threading.Lock()
+_tree = {'source': None}
+
+
+def _build_tree(reference_data):
+    subcategories = {category.id: [] for category in reference_data['categories']}
+    for subcategory in reference_data['subcategories']:
+        subcategories.setdefault(subcategory.category_id, []).append(
+            {'id': subcategory.id, 'name': subcategory.name}
+        )
+
+    sections = {department.id: [] for department in reference_data['departments']}
+    for section in reference_data['sections']:
+        sections.setdefault(section.department_id, []).append(
+            {'id': section.id, 'name': section.name}
+        )
+
+    categories = [
+        {'id': category.id, 'name': category.name, 'subcategories': subcategories.get(category.id, [])}
+        for category in reference_data['categories']
+    ]
+    departments = [
+        {'id': department.id, 'name': department.name, 'sections': sections.get(department.id, [])}
+        for department in reference_data['departments']
+    ]
+
+    return {
+        'source': reference_data,
+        'etag': f"taxonomy-{reference_data['version']}",
+        'category_names': {category.id: category.name for category in reference_data['categories']},
+        'subcategory_names': {subcategory.id: subcategory.name for subcategory in reference_data['subcategories']},
+        'department_names': {department.id: department.name for department in reference_data['departments']},
+        'section_names': {section.id: section.name for section in reference_data['sections']},
+        'subcategories': subcategories,
+        'sections': sections,
+        'payload': {'version': reference_data['version'], 'categories': categories, 'departments': departments},
+        # تُحوَّل إلى JSON مرة واحدة لكل بناء وتُضمَّن في الصفحة كما هي
+        'json': htmlsafe_json_dumps({'subcategories': subcategories, 'sections': sections})
+    }
+
+
+def get_taxonomy_tree(check_version=False):
+    """الشجرة الحالية (يُعاد بناؤها فقط عند إعادة تحميل البيانات المرجعية)"""
+    global _tree
+    reference_data = get_reference_data(check_version)
+    tree = _tree
+    if tree['source'] is not reference_data:
+        with _lock:
+            if _tree['source'] is not reference_data:
+                _tree = _build_tree(reference_data)
+            tree = _tree
+    return tree
+
+
+def taxonomy_json():
+    """الشجرة بصيغة JSON آمنة للتضمين داخل وسم script"""
+    return get_taxonomy_tree()['json']
+
+
+# (مفتاح الأسماء في الشجرة، الجدول) لكل جزء من عنوان البلاغ
+TITLE_PARTS = (
+    ('category_names', Category),
+    ('subcategory_names', SubCategory),
+    ('department_names', Department),
+    ('section_names', Section),
+)
+
+
+def build_ticket_title(category_id, subcategory_id=None, department_id=None, section_id=None):
+    """
+    عنوان البلاغ التلقائي: التصنيف - التصنيف الفرعي - الإدارة - القسم
+
+    إذا لم يوجد معرف في الشجرة (أضافته عملية أخرى ولم تلاحظ هذه العملية التغيير بعد) يُتحقق
+    من رقم إصدار البيانات المرجعية فوراً، ثم يُقرأ الاسم من قاعدة البيانات إذا بقي مفقوداً.
+    المعرفات غير الموجودة في قاعدة البيانات يتم تجاهلها، ويُقص العنوان إلى طول عمود title.
+    """
+    ids = (category_id, subcategory_id, department_id, section_id if department_id else None)
+    tree = get_taxonomy_tree()
+    if any(value and value not in tree[key] for value, (key, _) in zip(ids, TITLE_PARTS)):
+        tree = get_taxonomy_tree(check_version=True)
+
+    parts = []
+    for value, (key, model) in zip(ids, TITLE_PARTS):
+        if not value:
+            continue
+        name = tree[key].get(value)
+        if name is None:
+            row = db.session.get(model, value)
+            name = row.name if row else None
+        if name is not None:
+            parts.append(name)
+    return ' - '.join(parts)[:TITLE_MAX_LENGTH]
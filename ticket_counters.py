@@ -0,0 +1,223 @@
+"""
+ticket_counters.py - عدادات البلاغات والتجميع اليومي المحدثة تلقائياً عبر أحداث SQLAlchemy
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Ticket, TicketCounter, TicketDailyRollup
+
+# الحقول التي تؤثر على العدادات والتجميع اليومي
+COUNTED_FIELDS = ('status_id', 'priority_id', 'created_by_id', 'assigned_to_id', 'category_id', 'created_at')
+
+COUNTER_KEY_COLUMNS = ('dimension', 'key_id', 'sub_key_id')
+ROLLUP_KEY_COLUMNS = ('day', 'category_id', 'status_id', 'priority_id', 'assignee_id')
+
+
+def _counter_keys(values):
+    """مفاتيح العدادات التي يُحسب فيها بلاغ بهذه القيم"""
+    keys = [
+        ('status', values['status_id'], 0),
+        ('priority', values['priority_id'], 0),
+        ('creator_status', values['created_by_id'], values['status_id'])
+    ]
+    if values['assigned_to_id']:
+        keys.append(('assignee_status', values['assigned_to_id'], values['status_id']))
+    return keys
+
+
+def _rollup_key(values):
+    """مفتاح صف التجميع اليومي الذي يُحسب فيه بلاغ بهذه القيم"""
+    if not values['created_at']:
+        return None
+    return (
+        values['created_at'].date(),
+        values['category_id'],
+        values['status_id'],
+        values['priority_id'],
+        values['assigned_to_id'] or 0
+    )
+
+
+def _collect_deltas(values, sign, counter_deltas, rollup_deltas):
+    """إضافة (أو طرح) بلاغ بهذه القيم إلى فروقات العدادات والتجميع اليومي"""
+    for key in _counter_keys(values):
+        counter_deltas[key] += sign
+    rollup_key = _rollup_key(values)
+    if rollup_key:
+        rollup_deltas[rollup_key] += sign
+
+
+def _apply_deltas(connection, model, key_columns, deltas):
+    """تطبيق فروقات العد على جدول تجميعي داخل نفس المعاملة التي تحفظ البلاغ"""
+    table = model.__table__
+    dialect = connection.dialect.name
+
+    for key, delta in deltas.items():
+        if not delta or any(value is None for value in key):
+            continue
+
+        values = dict(zip(key_columns, key))
+        values['count'] = delta
+
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+            statement = insert(table).values(**values).on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={'count': table.c.count + delta}
+            )
+            connection.execute(statement)
+        else:
+            condition = db.and_(*[table.c[column] == values[column] for column in key_columns])
+            result = connection.execute(table.update().where(condition).values(count=table.c.count + delta))
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**values))
+
+
+def _apply_all(connection, counter_deltas, rollup_deltas):
+    _apply_deltas(connection, TicketCounter, COUNTER_KEY_COLUMNS, counter_deltas)
+    _apply_deltas(connection, TicketDailyRollup, ROLLUP_KEY_COLUMNS, rollup_deltas)
+
+
+def _current_values(target):
+    return {field: getattr(target, field) for field in COUNTED_FIELDS}
+
+
+@event.listens_for(Ticket, 'after_insert')
+def _ticket_inserted(mapper, connection, target):
+    """زيادة العدادات عند إضافة بلاغ"""
+    counter_deltas, rollup_deltas = defaultdict(int), defaultdict(int)
+    _collect_deltas(_current_values(target), 1, counter_deltas, rollup_deltas)
+    _apply_all(connection, counter_deltas, rollup_deltas)
+
+
+@event.listens_for(Ticket, 'after_update')
+def _ticket_updated(mapper, connection, target):
+    """نقل البلاغ بين العدادات عند تغيير حالته أو أولويته أو تصنيفه أو المستخدمين المرتبطين به"""
+    state = inspect(target)
+    new_values = _current_values(target)
+    old_values = dict(new_values)
+    changed = False
+
+    for field in COUNTED_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            old_values[field] = history.deleted[0]
+            changed = True
+
+    if not changed:
+        return
+
+    counter_deltas, rollup_deltas = defaultdict(int), defaultdict(int)
+    _collect_deltas(old_values, -1, counter_deltas, rollup_deltas)
+    _collect_deltas(new_values, 1, counter_deltas, rollup_deltas)
+    _apply_all(connection, counter_deltas, rollup_deltas)
+
+
+@event.listens_for(Ticket, 'after_delete')
+def _ticket_deleted(mapper, connection, target):
+    """إنقاص العدادات عند حذف بلاغ"""
+    counter_deltas, rollup_deltas = defaultdict(int), defaultdict(int)
+    _collect_deltas(_current_values(target), -1, counter_deltas, rollup_deltas)
+    _apply_all(connection, counter_deltas, rollup_deltas)
+
+
+def move_rollup_category(old_category_id, new_category_id):
+    """
+    نقل صفوف التجميع اليومي من تصنيف إلى آخر
+
+    يُستدعى بعد التحديث الجماعي لتصنيف البلاغات (Query.update) لأنه لا يمر عبر أحداث SQLAlchemy.
+    """
+    rollup_deltas = defaultdict(int)
+    for row in TicketDailyRollup.query.filter_by(category_id=old_category_id).all():
+        rollup_deltas[(row.day, old_category_id, row.status_id, row.priority_id, row.assignee_id)] -= row.count
+        rollup_deltas[(row.day, new_category_id, row.status_id, row.priority_id, row.assignee_id)] += row.count
+    _apply_deltas(db.session.connection(), TicketDailyRollup, ROLLUP_KEY_COLUMNS, rollup_deltas)
+
+
+def _as_date(value):
+    """تحويل ناتج date() من قاعدة البيانات إلى كائن date (SQLite تعيده كنص)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def rebuild_ticket_counters():
+    """إعادة حساب جميع العدادات وصفوف التجميع اليومي من جدول البلاغات مباشرة"""
+    TicketCounter.__table__.create(db.engine, checkfirst=True)
+    TicketDailyRollup.__table__.create(db.engine, checkfirst=True)
+
+    counter_rows = []
+    grouped_queries = [
+        ('status', [Ticket.status_id]),
+        ('priority', [Ticket.priority_id]),
+        ('creator_status', [Ticket.created_by_id, Ticket.status_id]),
+        ('assignee_status', [Ticket.assigned_to_id, Ticket.status_id])
+    ]
+
+    for dimension, columns in grouped_queries:
+        query = db.session.query(*columns, db.func.count(Ticket.id)).group_by(*columns)
+        if dimension == 'assignee_status':
+            query = query.filter(Ticket.assigned_to_id.isnot(None))
+
+        for row in query.all():
+            counter_rows.append({
+                'dimension': dimension,
+                'key_id': row[0],
+                'sub_key_id': (row[1] if len(columns) > 1 else 0) or 0,
+                'count': row[-1]
+            })
+
+    day_column = db.func.date(Ticket.created_at)
+    rollup_columns = [day_column, Ticket.category_id, Ticket.status_id, Ticket.priority_id, Ticket.assigned_to_id]
+    rollup_rows = []
+    for day, category_id, status_id, priority_id, assigned_to_id, count in db.session.query(
+        *rollup_columns, db.func.count(Ticket.id)
+    ).filter(Ticket.created_at.isnot(None)).group_by(*rollup_columns).all():
+        rollup_rows.append({
+            'day': _as_date(day),
+            'category_id': category_id,
+            'status_id': status_id,
+            'priority_id': priority_id,
+            'assignee_id': assigned_to_id or 0,
+            'count': count
+        })
+
+    TicketCounter.query.delete()
+    TicketDailyRollup.query.delete()
+    if counter_rows:
+        db.session.execute(TicketCounter.__table__.insert(), counter_rows)
+    if rollup_rows:
+        db.session.execute(TicketDailyRollup.__table__.insert(), rollup_rows)
+    db.session.commit()
+
+    return len(counter_rows) + len(rollup_rows)
+
+
+def ensure_ticket_counters():
+    """إنشاء جداول العدادات والتجميع اليومي وتعبئتها إذا لم تكن موجودة في قاعدة بيانات قائمة"""
+    inspector = inspect(db.engine)
+    if not inspector.has_table(Ticket.__tablename__):
+        return False
+    if inspector.has_table(TicketCounter.__tablename__) and inspector.has_table(TicketDailyRollup.__tablename__):
+        return False
+
+    rebuild_ticket_counters()
+    return True
+
+
+def counter_totals(dimension, key_id=None):
+    """
+    قراءة العدادات لبُعد معين
+
+    Returns:
+        dict: للأبعاد العامة {key_id: count}، ولأبعاد المستخدم {status_id: count} لمستخدم key_id
+    """
+    query = TicketCounter.query.filter_by(dimension=dimension)
+    if key_id is not None:
+        return {counter.sub_key_id: counter.count for counter in query.filter_by(key_id=key_id)}
+    return {counter.key_id: counter.count for counter in query}
@@ -0,0 +1,103 @@
+"""
+ticket_queries.py - طبقة استعلامات قوائم البلاغات مع التحميل المسبق للعلاقات
+"""
+
+from sqlalchemy.orm import joinedload
+from models import db, Ticket
+from ticket_registry import open_status_ids
+
+# العلاقات التي تعرضها كل صفحة لكل صف من البلاغات
+# تحميلها مسبقاً بـ JOIN يجعل عدد الاستعلامات ثابتاً مهما كان عدد الصفوف
+LOADING_PROFILES = {
+    'admin_dashboard': ('category', 'priority', 'status', 'creator', 'assignee'),
+    'overdue': ('category', 'priority', 'status', 'assignee'),
+    'maintenance_dashboard': ('category', 'priority', 'status'),
+    'my_tickets': ('category', 'priority', 'status', 'assignee'),
+    'maintenance_reports': ('category', 'priority', 'status'),
+    'maintenance_forms': ('category', 'subcategory', 'priority', 'status', 'department', 'section',
+                          'beneficiary', 'assignee'),
+}
+
+# وسائط تصفية لوحة تحكم الإدارة (اسم الوسيط في الرابط -> عمود البلاغ)
+DASHBOARD_FILTERS = {
+    'priority': 'priority_id',
+    'status': 'status_id',
+    'category': 'category_id',
+}
+
+
+def ticket_listing_query(profile, query=None):
+    """
+    إنشاء استعلام لقائمة البلاغات يحمّل علاقات الصفحة المحددة مسبقاً
+
+    Args:
+        profile: اسم ملف التحميل من LOADING_PROFILES
+        query: استعلام أساسي (مع التصفية) لإضافة التحميل إليه، الافتراضي Ticket.query
+    """
+    if query is None:
+        query = Ticket.query
+
+    relations = LOADING_PROFILES[profile]
+    return query.options(*[joinedload(getattr(Ticket, name)) for name in relations])
+
+
+def dashboard_filters(args):
+    """قيم تصفية لوحة تحكم الإدارة من وسائط الطلب (None للوسيط غير المحدد)"""
+    return {name: args.get(name, type=int) for name in DASHBOARD_FILTERS}
+
+
+def dashboard_tickets_query(filters, query=None):
+    """
+    استعلام البلاغات المطابقة لتصفية لوحة تحكم الإدارة
+
+    Args:
+        filters: القيم من dashboard_filters
+        query: استعلام أساسي، الافتراضي Ticket.query
+    """
+    if query is None:
+        query = Ticket.query
+
+    conditions = {DASHBOARD_FILTERS[name]: value for name, value in filters.items() if value}
+    return query.filter_by(**conditions)
+
+
+def open_tickets_filter():
+    """شرط البلاغات المفتوحة (غير المغلقة أو المكتملة) بمعرفات الحالات من السجل"""
+    return Ticket.status_id.in_(open_status_ids())
+
+
+def days_late_expression(now):
+    """
+    تعبير SQL لعدد أيام التأخير الكاملة منذ الموعد النهائي حتى now
+
+    يعيد None لقواعد البيانات غير المدعومة ليتم الحساب في بايثون بدلاً من ذلك.
+    """
+    dialect = db.session.get_bind().dialect.name
+    now_param = db.literal(now, db.DateTime)
+
+    if dialect == 'sqlite':
+        return db.cast(db.func.julianday(now_param) - db.func.julianday(Ticket.due_date), db.Integer)
+    if dialect == 'postgresql':
+        seconds = db.func.extract('epoch', now_param - Ticket.due_date)
+        return db.cast(db.func.floor(seconds / 86400), db.Integer)
+    return None
+
+
+def overdue_tickets_query(now, query=None, profile='overdue'):
+    """
+    استعلام البلاغات المفتوحة المتجاوزة لموعدها النهائي مرتبة من الأكثر تأخيراً
+
+    يعتمد على الفهرس المركب (status_id, due_date) على جدول البلاغات.
+    كل صف في النتيجة عبارة عن (البلاغ، عدد أيام التأخير)، أو البلاغ فقط إذا لم تدعم
+    قاعدة البيانات حساب أيام التأخير.
+    """
+    query = ticket_listing_query(profile, query)
+    days_late = days_late_expression(now)
+    if days_late is not None:
+        query = query.add_columns(days_late.label('days_late'))
+
+    return query.filter(
+        open_tickets_filter(),
+        Ticket.due_date.isnot(None),
+        Ticket.due_date < now
+    ).order_by(Ticket.due_date.asc(), Ticket.id.asc())
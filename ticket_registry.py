@@ -0,0 +1,106 @@
+"""
+ticket_registry.py - سجل الحالات والأولويات المعيارية بمفاتيح ثابتة بدلاً من أسمائها المعروضة
+
+تُربط الأسماء بالمفاتيح مرة واحدة عند تحميل البيانات المرجعية، وبعدها تتم المقارنة بالمعرفات
+الرقمية فقط (مثل ticket.status_id == status_id('completed')).
+"""
+
+import threading
+from sqlalchemy import inspect
+from models import db, TicketStatus
+from reference_data import get_reference_data
+
+# ربط أسماء الحالات والأولويات المعيارية بمفاتيح ثابتة
+STATUS_CODES = {
+    'جديد': 'new',
+    'قيد المعالجة': 'in_progress',
+    'مكتمل': 'completed',
+    'مغلق': 'closed'
+}
+
+PRIORITY_CODES = {
+    'عالية': 'high',
+    'متوسطة': 'medium',
+    'منخفضة': 'low'
+}
+
+# الأولوية بوقت محدد تُعرف بالحقل is_custom وليس باسمها
+CUSTOM_PRIORITY_CODE = 'custom'
+
+# الحالات التي لا يُحسب فيها البلاغ مفتوحاً أو متأخراً
+CLOSED_STATUS_CODES = ('closed', 'completed')
+
+_lock = threading.Lock()
+_registry = {'source': None}
+
+
+def _build_registry(reference_data):
+    status_ids, status_codes = {}, {}
+    for status in reference_data['statuses']:
+        code = STATUS_CODES.get(status.name)
+        if code and code not in status_ids:
+            status_ids[code] = status.id
+            status_codes[status.id] = code
+
+    priority_ids, priority_codes = {}, {}
+    for priority in reference_data['priorities']:
+        code = CUSTOM_PRIORITY_CODE if priority.is_custom else PRIORITY_CODES.get(priority.name)
+        if code and code not in priority_ids:
+            priority_ids[code] = priority.id
+            priority_codes[priority.id] = code
+
+    return {
+        'source': reference_data,
+        'status_ids': status_ids,
+        'status_codes': status_codes,
+        'priority_ids': priority_ids,
+        'priority_codes': priority_codes,
+        'all_status_ids': [status.id for status in reference_data['statuses']]
+    }
+
+
+def ticket_registry():
+    """السجل الحالي (يُعاد بناؤه فقط عند إعادة تحميل البيانات المرجعية)"""
+    global _registry
+    reference_data = get_reference_data()
+    registry = _registry
+    if registry['source'] is not reference_data:
+        with _lock:
+            if _registry['source'] is not reference_data:
+                _registry = _build_registry(reference_data)
+            registry = _registry
+    return registry
+
+
+def load_ticket_registry():
+    """تحميل السجل عند بدء التشغيل (لا شيء قبل إنشاء الجداول بواسطة setup_api)"""
+    if not inspect(db.engine).has_table(TicketStatus.__tablename__):
+        return None
+    return ticket_registry()
+
+
+def status_id(code):
+    """معرف الحالة بالمفتاح الثابت (new, in_progress, completed, closed) أو None"""
+    return ticket_registry()['status_ids'].get(code)
+
+
+def status_code(status_id):
+    """المفتاح الثابت لمعرف الحالة أو None للحالات غير المعيارية"""
+    return ticket_registry()['status_codes'].get(status_id)
+
+
+def priority_id(code):
+    """معرف الأولوية بالمفتاح الثابت (high, medium, low, custom) أو None"""
+    return ticket_registry()['priority_ids'].get(code)
+
+
+def priority_code(priority_id):
+    """المفتاح الثابت لمعرف الأولوية أو None"""
+    return ticket_registry()['priority_codes'].get(priority_id)
+
+
+def open_status_ids():
+    """معرفات الحالات المفتوحة (غير المغلقة أو المكتملة)"""
+    registry = ticket_registry()
+    closed_ids = {registry['status_ids'].get(code) for code in CLOSED_STATUS_CODES}
+    return [status_id for status_id in registry['all_status_ids'] if status_id not in closed_ids]
@@ -0,0 +1,202 @@
+"""
+ticket_stats.py - خدمة إحصائيات البلاغات باستعلام تجميعي واحد لكل بُعد
+"""
+
+from datetime import datetime, timedelta
+from models import db, User, Ticket, TicketStatus, TicketPriority, TicketCounter, TicketDailyRollup
+from ticket_counters import _as_date
+from ticket_registry import STATUS_CODES, PRIORITY_CODES, CUSTOM_PRIORITY_CODE, status_id, status_code, priority_code
+
+
+def compute_ticket_statistics():
+    """
+    حساب إحصائيات البلاغات حسب الحالة والأولوية من جدول البلاغات مباشرة
+
+    يتم تنفيذ استعلام GROUP BY واحد لكل بُعد (الحالات، الأولويات) مع الربط بجدول
+    البُعد نفسه، لذلك تظهر الحالات والأولويات التي لا تحتوي على بلاغات بعدد صفر.
+
+    Returns:
+        dict: يحتوي على العدد حسب معرف الحالة والأولوية، والمجاميع المشتقة منها
+    """
+    status_rows = db.session.query(
+        TicketStatus.id, db.func.count(Ticket.id)
+    ).outerjoin(Ticket, Ticket.status_id == TicketStatus.id).group_by(TicketStatus.id).all()
+
+    priority_rows = db.session.query(
+        TicketPriority.id, db.func.count(Ticket.id)
+    ).outerjoin(Ticket, Ticket.priority_id == TicketPriority.id).group_by(TicketPriority.id).all()
+
+    return _build_statistics(status_rows, priority_rows)
+
+
+def get_ticket_statistics():
+    """
+    قراءة إحصائيات البلاغات من جدول العدادات
+
+    عدد الصفوف المقروءة يساوي عدد الحالات والأولويات فقط مهما كان عدد البلاغات،
+    ونتيجتها مطابقة لـ compute_ticket_statistics.
+    """
+    status_rows = db.session.query(
+        TicketStatus.id, db.func.coalesce(TicketCounter.count, 0)
+    ).outerjoin(TicketCounter, db.and_(
+        TicketCounter.dimension == 'status', TicketCounter.key_id == TicketStatus.id
+    )).all()
+
+    priority_rows = db.session.query(
+        TicketPriority.id, db.func.coalesce(TicketCounter.count, 0)
+    ).outerjoin(TicketCounter, db.and_(
+        TicketCounter.dimension == 'priority', TicketCounter.key_id == TicketPriority.id
+    )).all()
+
+    return _build_statistics(status_rows, priority_rows)
+
+
+def get_user_ticket_statistics(dimension, user_id):
+    """
+    إحصائيات بلاغات مستخدم من جدول العدادات
+
+    Args:
+        dimension: creator_status للبلاغات التي أنشأها، أو assignee_status للمسندة إليه
+        user_id: معرف المستخدم
+
+    Returns:
+        dict: الإجمالي، وغير المغلقة، والمكتملة
+    """
+    rows = db.session.query(TicketCounter.sub_key_id, TicketCounter.count).filter(
+        TicketCounter.dimension == dimension, TicketCounter.key_id == user_id
+    ).all()
+
+    totals = {'total': 0, 'active': 0, 'completed': 0}
+    for row_status_id, count in rows:
+        totals['total'] += count
+        code = status_code(row_status_id)
+        if code != 'closed':
+            totals['active'] += count
+        if code == 'completed':
+            totals['completed'] += count
+
+    return totals
+
+
+def _build_statistics(status_rows, priority_rows):
+    """تحويل صفوف العد حسب الحالة والأولوية إلى قاموس الإحصائيات"""
+    by_status = {}
+    statuses_count = {code: 0 for code in STATUS_CODES.values()}
+    for row_status_id, count in status_rows:
+        by_status[row_status_id] = count
+        code = status_code(row_status_id)
+        if code:
+            statuses_count[code] += count
+
+    by_priority = {}
+    priorities_count = {code: 0 for code in PRIORITY_CODES.values()}
+    priorities_count[CUSTOM_PRIORITY_CODE] = 0
+    for row_priority_id, count in priority_rows:
+        by_priority[row_priority_id] = count
+        code = priority_code(row_priority_id)
+        if code:
+            priorities_count[code] += count
+
+    total = sum(by_status.values())
+
+    return {
+        'total': total,
+        'open': total - statuses_count['closed'],
+        'completed': statuses_count['completed'],
+        'high_priority': priorities_count['high'],
+        'by_status': by_status,
+        'by_priority': by_priority,
+        'statuses_count': statuses_count,
+        'priorities_count': priorities_count
+    }
+
+
+def _filter_report_tickets(query, category_id=None, user_id=None, priority_id=None):
+    """تطبيق مرشحات التقرير على استعلام البلاغات"""
+    if category_id:
+        query = query.filter(Ticket.category_id == category_id)
+    if user_id:
+        query = query.filter(db.or_(Ticket.created_by_id == user_id, Ticket.assigned_to_id == user_id))
+    if priority_id:
+        query = query.filter(Ticket.priority_id == priority_id)
+    return query
+
+
+def _raw_report_rows(start, end=None, category_id=None, user_id=None, priority_id=None):
+    """تجميع البلاغات مباشرة من جدول البلاغات بنفس شكل صفوف التجميع اليومي"""
+    columns = [db.func.date(Ticket.created_at), Ticket.category_id, Ticket.status_id,
+               Ticket.priority_id, Ticket.assigned_to_id]
+    query = db.session.query(*columns, db.func.count(Ticket.id)).filter(Ticket.created_at >= start)
+    if end:
+        query = query.filter(Ticket.created_at < end)
+    query = _filter_report_tickets(query, category_id, user_id, priority_id)
+
+    return [(_as_date(day), category, status, priority, assignee, count)
+            for day, category, status, priority, assignee, count in query.group_by(*columns).all()]
+
+
+def report_rows(start, category_id=None, user_id=None, priority_id=None):
+    """
+    صفوف عدد البلاغات المنشأة منذ start على شكل (اليوم، التصنيف، الحالة، الأولوية، الفني، العدد)
+
+    الأيام الكاملة تُقرأ من جدول التجميع اليومي. اليوم الأول جزئي لأن الفترة تبدأ من
+    وقت محدد، لذلك يُجمّع من جدول البلاغات مباشرة. مرشح المستخدم يشمل منشئ البلاغ وهو
+    ليس من أبعاد التجميع، لذلك يُحسب التقرير في هذه الحالة من جدول البلاغات بالكامل.
+    """
+    if user_id:
+        return _raw_report_rows(start, None, category_id, user_id, priority_id)
+
+    first_full_day = start.date()
+    if start != datetime.combine(first_full_day, datetime.min.time()):
+        first_full_day += timedelta(days=1)
+    boundary = datetime.combine(first_full_day, datetime.min.time())
+
+    rows = _raw_report_rows(start, boundary, category_id, None, priority_id)
+
+    query = TicketDailyRollup.query.filter(TicketDailyRollup.day >= first_full_day, TicketDailyRollup.count != 0)
+    if category_id:
+        query = query.filter(TicketDailyRollup.category_id == category_id)
+    if priority_id:
+        query = query.filter(TicketDailyRollup.priority_id == priority_id)
+
+    rows.extend((row.day, row.category_id, row.status_id, row.priority_id, row.assignee_id or None, row.count)
+                for row in query.all())
+    return rows
+
+
+def report_overdue_count(start, category_id=None, user_id=None, priority_id=None):
+    """عدد البلاغات المنشأة منذ start والمتجاوزة لموعدها النهائي"""
+    query = db.session.query(db.func.count(Ticket.id)).filter(
+        Ticket.created_at >= start,
+        Ticket.due_date < datetime.utcnow()
+    )
+    return _filter_report_tickets(query, category_id, user_id, priority_id).scalar() or 0
+
+
+def technician_performance_rows(start, category_id=None, user_id=None, priority_id=None):
+    """
+    إحصائيات فنيي الصيانة للبلاغات المنشأة منذ start باستعلام تجميعي واحد
+
+    Returns:
+        list: صفوف (المعرف، الاسم، المسندة، المكتملة، المتأخرة، مجموع ساعات الاستجابة)
+        للفنيين الذين لديهم بلاغات مسندة في الفترة، مرتبة حسب معرف الفني
+    """
+    completed = db.case((Ticket.status_id == status_id('completed'), 1), else_=0)
+    overdue = db.case((Ticket.due_date < datetime.utcnow(), 1), else_=0)
+
+    query = db.session.query(
+        User.id,
+        User.name,
+        db.func.count(Ticket.id),
+        db.func.coalesce(db.func.sum(completed), 0),
+        db.func.coalesce(db.func.sum(overdue), 0),
+        db.func.coalesce(db.func.sum(db.func.coalesce(TicketPriority.response_time, 0)), 0)
+    ).join(Ticket, Ticket.assigned_to_id == User.id).join(
+        TicketPriority, TicketPriority.id == Ticket.priority_id
+    ).filter(
+        User.user_type == 'maintenance',
+        Ticket.created_at >= start
+    )
+    query = _filter_report_tickets(query, category_id, user_id, priority_id)
+
+    return query.group_by(User.id, User.name).order_by(User.id).all()
@@ -0,0 +1,86 @@
+"""
+user_context.py - تحديد المستخدم الحالي مرة واحدة لكل طلب وحفظه في flask.g
+
+الهوية (المعرف، الاسم، النوع...) تكفي للتحقق من الصلاحيات وللقوالب، ويمكن تخزينها مؤقتاً في
+كل عملية لمدة قصيرة (USER_CACHE_TTL بالثواني، 0 للتعطيل). كائن المستخدم الكامل من قاعدة
+البيانات يُحمّل فقط عندما تحتاجه الصفحة (للتعديل أو لعلاقاته)، ومرة واحدة في الطلب.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app, g, session
+from sqlalchemy import event
+from models import db, User
+
+UserIdentity = namedtuple('UserIdentity', 'id username name user_type email phone')
+
+_lock = threading.Lock()
+_identities = {}  # معرف المستخدم -> (وقت الانتهاء، الهوية)
+
+
+def _identity_from_user(user):
+    return UserIdentity(user.id, user.username, user.name, user.user_type, user.email, user.phone)
+
+
+def _cached_identity(user_id):
+    with _lock:
+        entry = _identities.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        _identities.pop(user_id, None)
+    return None
+
+
+def _store_identity(identity):
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if ttl > 0:
+        with _lock:
+            _identities[identity.id] = (time.monotonic() + ttl, identity)
+
+
+def forget_user(user_id):
+    """حذف هوية المستخدم من الذاكرة المؤقتة لهذه العملية"""
+    with _lock:
+        _identities.pop(user_id, None)
+
+
+def load_current_identity():
+    """
+    هوية المستخدم المسجل دخوله في الطلب الحالي، أو None
+
+    تُحسب مرة واحدة لكل طلب: من الذاكرة المؤقتة إن وجدت، وإلا باستعلام واحد يُحفظ ناتجه
+    أيضاً ككائن المستخدم الكامل للطلب.
+    """
+    if 'current_identity' in g:
+        return g.current_identity
+
+    identity = None
+    user_id = session.get('user_id')
+    if user_id is not None:
+        identity = _cached_identity(user_id)
+        if identity is None:
+            user = db.session.get(User, user_id)
+            g.current_user = user
+            if user:
+                identity = _identity_from_user(user)
+                _store_identity(identity)
+
+    g.current_identity = identity
+    return identity
+
+
+def get_current_user():
+    """كائن المستخدم الحالي من قاعدة البيانات (يُحمّل مرة واحدة لكل طلب)"""
+    if 'current_user' not in g:
+        identity = load_current_identity()
+        if 'current_user' not in g:
+            g.current_user = db.session.get(User, identity.id) if identity else None
+    return g.current_user
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # تعديل أو حذف المستخدم يلغي هويته المخزنة في هذه العملية فوراً
+    forget_user(target.id)